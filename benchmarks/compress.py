@@ -0,0 +1,72 @@
+"""
+Compare compressing the output of `render` afterwards with compressing it
+as it is rendered, with and without precompressed static parts.
+
+Run from the repository root with: python -m benchmarks.compress
+"""
+
+from hotmetal import render, static
+from hotmetal.utils.compress import precompressed, render_compressed
+from timeit import repeat
+
+import gzip
+
+
+def page(wrap):
+    navigation = wrap(
+        (
+            "nav",
+            {"class": "categories"},
+            [
+                (
+                    "ul",
+                    {},
+                    [
+                        (
+                            "li",
+                            {},
+                            [("a", {"href": f"/c/{i}/{j}/"}, [f"Category {i}.{j}"])],
+                        )
+                        for j in range(40)
+                    ],
+                )
+                for i in range(20)
+            ],
+        )
+    )
+    return lambda: (
+        "html",
+        {},
+        [
+            ("head", {}, [("title", {}, ["Page"])]),
+            (
+                "body",
+                {},
+                [
+                    navigation,
+                    ("main", {}, [("p", {}, [f"Item {i}"]) for i in range(50)]),
+                ],
+            ),
+        ],
+    )
+
+
+def best_of(fn, number=20):
+    return min(repeat(fn, number=number, repeat=5)) / number
+
+
+def main():
+    plain = page(static)
+    spliced = page(precompressed)
+    cases = {
+        "gzip.compress(render)": lambda: gzip.compress(render(plain()).encode()),
+        "render_compressed": lambda: b"".join(render_compressed(plain())),
+        "  + precompressed": lambda: b"".join(render_compressed(spliced())),
+    }
+    print(f"{'':<24}{'ms':>8}{'bytes':>10}")
+    for name, fn in cases.items():
+        print(f"{name:<24}{best_of(fn) * 1000:>8.2f}{len(fn()):>10,}")
+
+
+if __name__ == "__main__":
+    main()
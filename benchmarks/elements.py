@@ -0,0 +1,59 @@
+"""
+Compare the memory used by a large tree built from `Element` nodes with the
+same tree built from tuples.
+
+Run from the repository root with: python -m benchmarks.elements
+"""
+
+from hotmetal import h, render
+
+import tracemalloc
+
+
+def tuple_table(rows):
+    return (
+        "table",
+        {},
+        [
+            ("tr", {}, [("td", {}, [str(i)]), ("td", {}, [("b", {}, ["x"])])])
+            for i in range(rows)
+        ],
+    )
+
+
+def element_table(rows):
+    return h(
+        "table",
+        None,
+        [
+            h(
+                "tr",
+                None,
+                [h("td", None, [str(i)]), h("td", None, [h("b", None, ["x"])])],
+            )
+            for i in range(rows)
+        ],
+    )
+
+
+def allocated(build, rows):
+    tracemalloc.start()
+    tree = build(rows)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return tree, size
+
+
+def main(rows=20000):
+    nodes = rows * 4 + 1
+    print(f"{'tree':<10}{'KiB':>12}{'bytes/node':>14}")
+    results = {}
+    for name, build in [("tuple", tuple_table), ("element", element_table)]:
+        tree, size = allocated(build, rows)
+        results[name] = render(tree)
+        print(f"{name:<10}{size / 1024:>12,.0f}{size / nodes:>14.1f}")
+    assert results["tuple"] == results["element"]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Compare escaping in the current implementation against hotmetal 1.0.0, and
+against a single-pass str.translate implementation.
+
+Run from the repository root with: python -m benchmarks.escape
+"""
+
+from benchmarks import reference
+from hotmetal import _esc
+from timeit import repeat
+
+TRANSLATION = {
+    ord("&"): "&amp;",
+    ord("<"): "&lt;",
+    ord(">"): "&gt;",
+    ord('"'): "&quot;",
+    ord("'"): "&#x27;",
+}
+
+
+def translate(s):
+    return s.translate(TRANSLATION)
+
+
+WORKLOADS = [
+    ("tag name", "div"),
+    ("short text", "Hello world"),
+    ("short special", "Tom & Jerry"),
+    ("long text", "Lorem ipsum dolor sit amet. " * 40),
+    ("long special", "if (a < b && b > c) { alert('hi') } " * 40),
+]
+
+
+def best_of(fn, number=100000):
+    return min(repeat(fn, number=number, repeat=5)) / number
+
+
+def main():
+    print(
+        f"{'workload':<16}{'1.0.0 (us)':>12}{'translate (us)':>16}{'current (us)':>14}"
+    )
+    for name, s in WORKLOADS:
+        assert _esc(s) == reference._esc(s) == translate(s)
+        old = best_of(lambda: reference._esc(s))
+        single_pass = best_of(lambda: translate(s))
+        new = best_of(lambda: _esc(s))
+        print(
+            f"{name:<16}{old * 1e6:>12.3f}{single_pass * 1e6:>16.3f}{new * 1e6:>14.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+Compare the size and rendering time of normal and minified output.
+
+Run from the repository root with: python -m benchmarks.minify
+"""
+
+from benchmarks.workloads import context_heavy, forms, table, thread, user_text
+from hotmetal import render
+from timeit import repeat
+
+MODES = {
+    "indent=0": {},
+    "minify": {"minify": True},
+    "minify+omit": {"minify": True, "omit_optional_tags": True},
+}
+
+
+def main():
+    context = {"user": "<admin>", "admin": True}
+    trees = {
+        "table": table(),
+        "thread": thread(),
+        "forms": forms(),
+        "user_text": user_text(),
+        "context_heavy": context_heavy(),
+    }
+    print(f"{'workload':<16}{'mode':<14}{'KiB':>10}{'saved':>8}{'ms':>10}")
+    for name, tree in trees.items():
+        baseline = None
+        for mode, options in MODES.items():
+            size = len(render(tree, context, **options).encode())
+            baseline = baseline or size
+            seconds = min(
+                repeat(lambda: render(tree, context, **options), number=1, repeat=5)
+            )
+            print(
+                f"{name:<16}{mode:<14}{size / 1024:>10,.0f}"
+                f"{1 - size / baseline:>8.1%}{seconds * 1000:>10.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
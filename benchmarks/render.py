@@ -0,0 +1,58 @@
+"""
+Compare the current renderer against the hotmetal 1.0.0 renderer.
+
+Run from the repository root with: python -m benchmarks.render
+"""
+
+from benchmarks import reference
+from timeit import repeat
+
+import hotmetal
+import sys
+
+
+def wide_tree(rows=2000):
+    return (
+        "table",
+        {"class": "listing"},
+        [
+            (
+                "tr",
+                {"id": f"row-{i}"},
+                [("td", {}, [f"cell {i}"]), ("td", {}, [("a", {"href": "#"}, ["x"])])],
+            )
+            for i in range(rows)
+        ],
+    )
+
+
+def deep_tree(depth=500):
+    node = "leaf"
+    for i in range(depth):
+        node = ("div", {"class": "level"}, [node, ("span", {}, [str(i)])])
+    return node
+
+
+def best_of(fn, number):
+    return min(repeat(fn, number=number, repeat=5)) / number
+
+
+def main():
+    sys.setrecursionlimit(10000)
+    workloads = [
+        ("wide", wide_tree(), 20),
+        ("deep", deep_tree(), 50),
+    ]
+    print(f"{'workload':<10}{'indent':>8}{'1.0.0 (ms)':>14}{'current (ms)':>14}")
+    for name, node, number in workloads:
+        for indent in (0, 2):
+            assert hotmetal.render(node, indent=indent) == reference.render(
+                node, indent=indent
+            )
+            old = best_of(lambda: reference.render(node, indent=indent), number)
+            new = best_of(lambda: hotmetal.render(node, indent=indent), number)
+            print(f"{name:<10}{indent:>8}{old * 1000:>14.2f}{new * 1000:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
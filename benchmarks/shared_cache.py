@@ -0,0 +1,74 @@
+"""
+Compare worker processes that each render the same expensive fragments with
+workers that share them through a `SharedCache`.
+
+Run from the repository root with: python -m benchmarks.shared_cache
+"""
+
+from hotmetal import render
+from hotmetal.utils.shared import SharedCache
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+import multiprocessing
+import os
+
+
+def category_tree(context):
+    return (
+        "nav",
+        {"class": "categories"},
+        [
+            (
+                "ul",
+                {},
+                [
+                    ("li", {}, [("a", {"href": f"/c/{i}/{j}/"}, [f"Category {i}.{j}"])])
+                    for j in range(40)
+                ],
+            )
+            for i in range(20)
+        ],
+    )
+
+
+def page(header, i):
+    return ("html", {}, [("body", {}, [header, ("main", {}, [f"Page {i}"])])])
+
+
+def worker(path, pages):
+    if path is None:
+        header = category_tree
+    else:
+        header = SharedCache(path, slots=64, slot_size=65536).node(
+            "categories", category_tree
+        )
+    for i in range(pages):
+        render(page(header, i))
+
+
+def run(processes, pages, path):
+    context = multiprocessing.get_context("fork")
+    workers = [
+        context.Process(target=worker, args=(path, pages)) for _ in range(processes)
+    ]
+    start = perf_counter()
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join()
+    return perf_counter() - start
+
+
+def main(processes=8, pages=200):
+    with TemporaryDirectory() as directory:
+        path = os.path.join(directory, "cache")
+        SharedCache(path, slots=64, slot_size=65536).close()
+        print(f"{processes} processes, {pages} pages each")
+        print(f"{'':<16}{'seconds':>10}")
+        print(f"{'no cache':<16}{run(processes, pages, None):>10.3f}")
+        print(f"{'shared cache':<16}{run(processes, pages, path):>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
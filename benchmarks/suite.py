@@ -0,0 +1,119 @@
+"""
+Benchmark suite for rendering, escaping, classnames and find.
+
+Run from the repository root with:
+
+    python -m benchmarks.suite                       # print results
+    python -m benchmarks.suite --save baseline.json  # save a baseline
+    python -m benchmarks.suite --compare baseline.json --threshold 0.2
+
+When comparing, the suite exits with a non-zero status if any workload is
+more than `threshold` (as a fraction) slower than the baseline, or uses more
+than `threshold` more peak memory, allocations or allocated memory.
+"""
+
+from benchmarks.workloads import workloads
+from timeit import repeat
+
+import argparse
+import json
+import sys
+import tracemalloc
+
+
+def allocations(run):
+    """
+    Return the number of memory blocks, and their total size in bytes, that
+    a run allocates and still holds when it returns (including its result),
+    from the difference between `tracemalloc` snapshots taken either side
+    of it. Snapshots are taken in a separate run from the peak memory
+    measurement, because they use memory themselves.
+    """
+    filters = [tracemalloc.Filter(False, tracemalloc.__file__)]
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot().filter_traces(filters)
+    result = run()
+    after = tracemalloc.take_snapshot().filter_traces(filters)
+    tracemalloc.stop()
+    del result
+    stats = after.compare_to(before, "filename")
+    return sum(stat.count_diff for stat in stats), sum(stat.size_diff for stat in stats)
+
+
+def measure(run, nodes, repeats):
+    seconds = min(repeat(run, number=1, repeat=repeats))
+    tracemalloc.start()
+    result = run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    count, size = allocations(run)
+    return {
+        "seconds": seconds,
+        "nodes_per_second": nodes / seconds,
+        # Only meaningful for workloads that produce HTML.
+        "mb_per_second": (
+            len(result.encode()) / seconds / 1e6 if isinstance(result, str) else None
+        ),
+        "peak_memory": peak,
+        "allocations": count,
+        "allocated_memory": size,
+    }
+
+
+def regressions(results, baseline, threshold):
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        for key in ("seconds", "peak_memory", "allocations", "allocated_memory"):
+            if key not in baseline[name]:
+                # Baselines saved before the key was added.
+                continue
+            before, after = baseline[name][key], result[key]
+            if after > before * (1 + threshold):
+                yield f"{name}: {key} went from {before:.6g} to {after:.6g}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--save", metavar="PATH", help="save results as JSON")
+    parser.add_argument("--compare", metavar="PATH", help="compare with a baseline")
+    parser.add_argument("--threshold", type=float, default=0.2)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--only", nargs="*", help="only run these workloads")
+    args = parser.parse_args(argv)
+
+    results = {}
+    print(
+        f"{'workload':<24}{'ms':>10}{'nodes/s':>14}{'MB/s':>10}{'peak KiB':>12}"
+        f"{'allocs':>10}{'alloc KiB':>12}"
+    )
+    for name, (run, nodes) in workloads().items():
+        if args.only and name not in args.only:
+            continue
+        result = results[name] = measure(run, nodes, args.repeats)
+        mb_per_second = result["mb_per_second"]
+        print(
+            f"{name:<24}{result['seconds'] * 1000:>10.2f}"
+            f"{result['nodes_per_second']:>14,.0f}"
+            f"{'-' if mb_per_second is None else f'{mb_per_second:.2f}':>10}"
+            f"{result['peak_memory'] / 1024:>12,.0f}"
+            f"{result['allocations']:>10,}"
+            f"{result['allocated_memory'] / 1024:>12,.0f}"
+        )
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        problems = list(regressions(results, baseline, args.threshold))
+        for problem in problems:
+            print(f"REGRESSION {problem}")
+        return 1 if problems else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
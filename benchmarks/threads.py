@@ -0,0 +1,78 @@
+"""
+Measure how the throughput of rendering pages in a `ThreadPoolExecutor`
+scales with the number of threads, with the pages sharing a `StaticCache`,
+a `static` node and a pure context callable, as they would in a threaded
+WSGI server.
+
+On a free-threaded build of Python, throughput should grow close to
+linearly with the number of threads (up to the number of cores). With the
+GIL, it should stay about the same as with one thread: any less would mean
+the threads are getting in each other's way.
+
+Run from the repository root with: python -m benchmarks.threads
+"""
+
+from benchmarks.workloads import table
+from concurrent.futures import ThreadPoolExecutor
+from hotmetal import render, static, StaticCache
+from hotmetal.utils.pure import pure
+from time import perf_counter
+
+import os
+import sys
+
+NAVIGATION = static(
+    ("nav", {}, [("a", {"href": f"/{i}/"}, [f"Section {i}"]) for i in range(20)])
+)
+FOOTER = ("footer", {}, (("p", {}, ("Terms & conditions",)),))
+
+
+@pure()
+def user_panel(context):
+    return ("div", {"class": "user"}, [context["user"]])
+
+
+def page(rows):
+    return (
+        "html",
+        {},
+        [("body", {}, [NAVIGATION, user_panel, table(rows), user_panel, FOOTER])],
+    )
+
+
+def run(threads, pages, rows, cache):
+    def render_page(i):
+        return render(page(rows), {"user": f"user {i % 10}"}, static_cache=cache)
+
+    start = perf_counter()
+    if threads is None:
+        for i in range(pages):
+            render_page(i)
+    else:
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            for _ in executor.map(render_page, range(pages)):
+                pass
+    return perf_counter() - start
+
+
+def main(pages=400, rows=100):
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", lambda: True)
+    print(
+        f"Python {sys.version.split()[0]}, "
+        f"GIL {'enabled' if is_gil_enabled() else 'disabled'}, "
+        f"{os.cpu_count()} CPUs, {pages} pages of {rows} rows"
+    )
+    print(f"{'threads':<10}{'pages/s':>10}{'speedup':>10}{'efficiency':>12}")
+    cache = StaticCache()
+    run(None, pages // 10, rows, cache)
+    # The baseline renders the pages one after the other, without a pool.
+    baseline = pages / min(run(None, pages, rows, cache) for _ in range(3))
+    print(f"{'serial':<10}{baseline:>10.0f}")
+    for threads in [1, 2, 4, 8, 16]:
+        rate = pages / min(run(threads, pages, rows, cache) for _ in range(3))
+        speedup = rate / baseline
+        print(f"{threads:<10}{rate:>10.0f}{speedup:>9.2f}x{speedup / threads:>11.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+Representative trees and operations for the benchmarks.
+"""
+
+from hotmetal import render
+from hotmetal.utils.classnames import classnames
+from hotmetal.utils.find import find, has_class, tag_is
+from hotmetal.utils.pure import pure
+
+LOREM = "Lorem ipsum dolor sit amet, consectetur adipiscing elit. "
+USER_TEXT = "<script>alert('x & y')</script> \"quoted\" & <b>bold</b> "
+
+
+def table(rows=10000):
+    return (
+        "table",
+        {"class": "listing"},
+        [
+            ("thead", {}, [("tr", {}, [("th", {}, [name]) for name in "abcd"])]),
+            (
+                "tbody",
+                {},
+                [
+                    (
+                        "tr",
+                        {"id": f"row-{i}", "class": "odd" if i % 2 else "even"},
+                        [
+                            ("td", {}, [str(i)]),
+                            ("td", {}, [f"Item {i}"]),
+                            ("td", {"class": "price"}, [f"{i * 1.5:.2f}"]),
+                            ("td", {}, [("a", {"href": f"/items/{i}/"}, ["View"])]),
+                        ],
+                    )
+                    for i in range(rows)
+                ],
+            ),
+        ],
+    )
+
+
+def thread(depth=1000):
+    node = ("p", {}, ["The end."])
+    for i in range(depth):
+        node = (
+            "div",
+            {"class": "comment", "id": f"comment-{i}"},
+            [("p", {"class": "author"}, [f"user{i}"]), ("p", {}, [LOREM]), node],
+        )
+    return node
+
+
+def forms(count=1000):
+    return (
+        "",
+        {},
+        [
+            (
+                "form",
+                {"method": "post", "action": f"/forms/{i}/", "class": "form"},
+                [
+                    (
+                        "input",
+                        {
+                            "type": "text",
+                            "name": f"field-{i}",
+                            "id": f"id_field-{i}",
+                            "class": "input big",
+                            "placeholder": "Type here",
+                            "maxlength": "100",
+                            "required": "",
+                            "autocomplete": "off",
+                            "data-validate": "true",
+                        },
+                        [],
+                    ),
+                    ("button", {"type": "submit", "disabled": ""}, ["Save"]),
+                ],
+            )
+            for i in range(count)
+        ],
+    )
+
+
+def user_text(count=5000):
+    return ("div", {}, [("p", {"title": USER_TEXT}, [USER_TEXT]) for _ in range(count)])
+
+
+def context_heavy(count=5000, wrap=lambda fn: fn):
+    @wrap
+    def greeting(context):
+        return ("span", {"class": "user"}, [context["user"]])
+
+    @wrap
+    def badge(context):
+        return ("b", {}, ["admin"]) if context["admin"] else None
+
+    return ("ul", {}, [("li", {}, [greeting, badge, str(i)]) for i in range(count)])
+
+
+def count_nodes(node):
+    return sum(1 for _ in find([node], lambda node: True))
+
+
+def _render(node, context=None):
+    def run():
+        return render(node, context)
+
+    return run
+
+
+def _classnames(rows=10000):
+    def run():
+        return [
+            classnames("row", {"odd": i % 2, "selected": i % 7 == 0}, ["a", ["b"]])
+            for i in range(rows)
+        ]
+
+    return run
+
+
+def _classnames_compiled(rows=10000):
+    row = classnames.compile("row", {"odd": ..., "selected": ...}, ["a", ["b"]])
+
+    def run():
+        return row.many({"odd": i % 2, "selected": i % 7 == 0} for i in range(rows))
+
+    return run
+
+
+def _find(node):
+    predicate = has_class("price")
+
+    def run():
+        return [*find([node], predicate), *find([node], tag_is("a"))]
+
+    return run
+
+
+def workloads():
+    """
+    Return a dict mapping workload names to (function, node count) pairs.
+    Each function performs one run of the workload. The node count is the
+    number of nodes (or, for classnames, calls) processed by each run.
+    """
+    context = {"user": "<admin>", "admin": True}
+    trees = {
+        "render_table": (table(), None),
+        "render_thread": (thread(), None),
+        "render_forms": (forms(), None),
+        "render_user_text": (user_text(), None),
+        "render_context_heavy": (context_heavy(), context),
+        "render_pure_callables": (context_heavy(wrap=pure()), context),
+    }
+    result = {
+        name: (_render(node, context), count_nodes(node))
+        for name, (node, context) in trees.items()
+    }
+    result["classnames"] = (_classnames(), 10000)
+    result["classnames_compiled"] = (_classnames_compiled(), 10000)
+    result["find_table"] = (_find(trees["render_table"][0]), result["render_table"][1])
+    return result
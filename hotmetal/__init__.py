@@ -10,76 +10,860 @@ class safe(str):
     pass
 
 
+class _EmptyAttrs:
+    """
+    An empty, read-only attribute mapping, so that a single one can be
+    shared by every `Element` without attributes. It has the read methods
+    of a dict, and `|` (and so `|=`) returns a new dict. It isn't a dict
+    subclass, because dict methods such as `|=` would change it in place.
+    """
+
+    __slots__ = ()
+
+    def __len__(self):
+        return 0
+
+    def __iter__(self):
+        return iter(())
+
+    def __contains__(self, key):
+        return False
+
+    def __getitem__(self, key):
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        raise TypeError("EMPTY_ATTRS can't be changed")
+
+    def get(self, key, default=None):
+        return default
+
+    def keys(self):
+        return ()
+
+    values = items = keys
+
+    def copy(self):
+        return {}
+
+    def __or__(self, other):
+        return dict(other)
+
+    __ror__ = __or__
+
+    def __eq__(self, other):
+        if isinstance(other, (dict, _EmptyAttrs)):
+            return not other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return "{}"
+
+    def __reduce__(self):
+        # Pickled and copied by reference, so there is only ever one.
+        return "EMPTY_ATTRS"
+
+
+EMPTY_ATTRS = _EmptyAttrs()
+
+
+class Element:
+    """
+    A compact alternative to a `(tag, attrs, children)` tuple. It can be
+    indexed, unpacked and compared like the tuple, so it can be used
+    anywhere a tuple node can. Elements without attributes all share
+    `EMPTY_ATTRS` rather than each having an empty dict.
+    """
+
+    __slots__ = ("tag", "attrs", "children")
+
+    def __init__(self, tag, attrs=None, children=()):
+        self.tag = tag
+        self.attrs = attrs or EMPTY_ATTRS
+        self.children = children
+
+    def __len__(self):
+        return 3
+
+    def __iter__(self):
+        return iter((self.tag, self.attrs, self.children))
+
+    def __getitem__(self, index):
+        return (self.tag, self.attrs, self.children)[index]
+
+    def __eq__(self, other):
+        if isinstance(other, (Element, tuple)):
+            return tuple(self) == tuple(other)
+        return NotImplemented
+
+    def __repr__(self):
+        return f"Element({self.tag!r}, {self.attrs!r}, {self.children!r})"
+
+
+def h(tag, attrs=None, children=()):
+    """
+    Build an `Element`. `attrs` and `children` can be left out.
+    """
+    return Element(tag, attrs, children)
+
+
+class static:
+    """
+    Wrap a node that never changes, so that it is only rendered once for
+    each indentation setting and nesting level at which it appears, and the
+    output is reused after that. The node must not depend on the context.
+    """
+
+    def __init__(self, node):
+        self.node = node
+        self.rendered = {}
+
+    def _render(self, context, indent, level):
+        key = (indent, level)
+        try:
+            return self.rendered[key]
+        except KeyError:
+            rendered = safe("".join(_render_iter(self.node, context, indent, level)))
+            self.rendered[key] = rendered
+            return rendered
+
+    def _tree(self, context):
+        """
+        Return the tree this node renders, so that it can be rendered in
+        another way (minified, for example), or None if it hasn't got one.
+        """
+        return getattr(self, "node", None)
+
+
+class StaticCache:
+    """
+    A bounded least-recently-used cache of rendered immutable subtrees, for
+    use with the `static_cache` argument of `render`.
+
+    A tree node is immutable if its children are a tuple of text nodes,
+    `static` nodes and other immutable nodes, with no context callables or
+    subclasses of `static` (which can depend on the context) anywhere
+    inside it. Entries are keyed by the identity of the node, so this is
+    most useful for subtrees defined once (at module level, for example)
+    and reused across many renders. Nodes that are found not to be
+    immutable are also remembered, so they are only checked once.
+
+    A cache can be shared by renders in any number of threads. It doesn't
+    take any locks: each entry is read or written with a single dict
+    operation, and if two threads miss the same entry at the same time, both
+    render it. The `hits` and `misses` counters may lose a few updates.
+    """
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = self.misses = 0
+
+    def _render(self, node, context, indent, level):
+        """
+        Return the rendered node, or None if it isn't immutable. Each entry
+        keeps a reference to its node, so the node's id can't be reused by
+        another object while the entry exists.
+        """
+        key = (id(node), indent, level)
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            self.misses += 1
+            rendered = (
+                safe("".join(_render_iter(node, context, indent, level)))
+                if _is_immutable(node)
+                else None
+            )
+            entry = (node, rendered)
+            if len(self._entries) >= self.maxsize:
+                try:
+                    del self._entries[next(iter(self._entries))]
+                except (KeyError, RuntimeError, StopIteration):
+                    # Another thread changed the entries at the same time,
+                    # so the cache can go over maxsize for a moment.
+                    pass
+        else:
+            self.hits += 1
+        self._entries[key] = entry
+        return entry[1]
+
+
+class RenderLimitExceeded(Exception):
+    """
+    Raised when a render goes over one of its `RenderLimits`. `limit` is the
+    name of the limit, `value` is its setting, and `path` is the names of
+    the context callables (by `__qualname__`) and tags enclosing the point
+    where it was exceeded.
+    """
+
+    def __init__(self, limit, value, path):
+        self.limit = limit
+        self.value = value
+        self.path = path
+        location = " > ".join(path) or "the root"
+        super().__init__(f"{limit}={value} exceeded at {location}")
+
+
+class RenderLimits:
+    """
+    Limits for the `limits` argument of `render`, `render_iter` and
+    `render_into`: the number of nodes (elements, text and context callables)
+    rendered, the depth of nested elements and context callables (fragments
+    don't count), the number of characters of output, and the number of
+    seconds the render may take. Any of them can be None for no limit. The
+    time is only checked every `check_every` nodes, so a single slow context
+    callable can't be interrupted.
+    """
+
+    def __init__(
+        self,
+        max_nodes=None,
+        max_depth=None,
+        max_bytes=None,
+        deadline=None,
+        check_every=256,
+        clock=None,
+    ):
+        self.max_nodes = max_nodes
+        self.max_depth = max_depth
+        self.max_bytes = max_bytes
+        self.deadline = deadline
+        self.check_every = check_every
+        if clock is None and deadline is not None:
+            try:
+                from time import monotonic as clock
+            except ImportError:  # MicroPython
+                from time import time as clock
+        self.clock = clock
+
+    def _start(self):
+        return _Limiter(self)
+
+
+class _Limiter:
+    """
+    Keeps track of one render's progress against its `RenderLimits`, with
+    the names of the enclosing context callables and tags in `path`.
+    """
+
+    def __init__(self, limits):
+        self.limits = limits
+        self.nodes = 0
+        self.bytes = 0
+        self.path = []
+        self.depth = 0
+        self.max_nodes = limits.max_nodes
+        self.max_depth = limits.max_depth
+        self.max_bytes = limits.max_bytes
+        self.check_every = limits.check_every if limits.deadline is not None else 0
+        if self.check_every:
+            self.ends = limits.clock() + limits.deadline
+
+    def exceeded(self, limit):
+        path = tuple(name for name in self.path if name)
+        raise RenderLimitExceeded(limit, getattr(self.limits, limit), path)
+
+    def node(self):
+        self.nodes += 1
+        if self.max_nodes is not None and self.nodes > self.max_nodes:
+            self.exceeded("max_nodes")
+        if (
+            self.check_every
+            and not self.nodes % self.check_every
+            and self.limits.clock() > self.ends
+        ):
+            self.exceeded("deadline")
+
+    def enter(self, name):
+        self.path.append(name)
+        # Fragments (with an empty tag) don't count towards the depth.
+        if name:
+            self.depth += 1
+            if self.max_depth is not None and self.depth > self.max_depth:
+                self.exceeded("max_depth")
+
+    def exit(self):
+        if self.path.pop():
+            self.depth -= 1
+
+    def count(self, fragments):
+        for fragment in fragments:
+            self.bytes += len(fragment)
+            if self.max_bytes is not None and self.bytes > self.max_bytes:
+                self.exceeded("max_bytes")
+            yield fragment
+
+
+# Escaped versions of recently seen short strings (tag names, attribute keys
+# and values, short bits of text), so that they don't need to be escaped again
+# every time they are rendered. The cache is simply emptied when it fills up.
+# Like the intern tables below, it is shared by all threads without a lock:
+# it's only used through single dict operations, which are atomic (with or
+# without the GIL), and every value in it is correct, so the worst a race
+# can do is make a string be escaped again.
+_esc_cache = {}
+ESC_CACHE_SIZE = 4096
+ESC_CACHE_MAX_LENGTH = 64
+
+
 def _esc(s):
     """
-    Replace special characters "&", "<" and ">" to HTML-safe sequences.
+    Replace special characters "&", "<", ">", '"' and "'" with HTML-safe
+    sequences.
 
     This function is largely copy-pasted from the "html" module in the cpython
     standard library to ensure it works on platforms that don't have this
-    module (eg micropython).
+    module (eg micropython). Strings that don't contain any special characters
+    are returned as they are, and short strings are cached.
     """
     if isinstance(s, safe):
         return s
 
-    s = s.replace("&", "&amp;")  # Must be done first!
-    s = s.replace("<", "&lt;")
-    s = s.replace(">", "&gt;")
-    s = s.replace('"', "&quot;")
-    s = s.replace("'", "&#x27;")
+    cacheable = len(s) <= ESC_CACHE_MAX_LENGTH
+    if cacheable:
+        escaped = _esc_cache.get(s)
+        if escaped is not None:
+            return escaped
+
+    escaped = s
+    if "&" in s or "<" in s or ">" in s or '"' in s or "'" in s:
+        escaped = (
+            s.replace("&", "&amp;")  # Must be done first!
+            .replace("<", "&lt;")
+            .replace(">", "&gt;")
+            .replace('"', "&quot;")
+            .replace("'", "&#x27;")
+        )
+
+    if cacheable:
+        if len(_esc_cache) >= ESC_CACHE_SIZE:
+            _esc_cache.clear()
+        _esc_cache[s] = escaped
+    return escaped
+
+
+# Precomputed pieces of markup for tag names and attribute keys, so that the
+# names that make up most pages are escaped (and checked against
+# VOID_ELEMENTS) only once. Tags map to the start and end of the opening tag
+# (to go either side of the attributes), the opening tag without attributes
+# and the closing tag. Attribute keys map to the key on its own (for empty
+# values) and the key followed by '="'. Both tables are seeded with the names
+# from the HTML spec (and common SVG ones), and other names are added as they
+# are seen until the table holds INTERN_TABLE_SIZE entries, after which they
+# are computed every time. This stops untrusted input from growing the tables
+# without limit. Names that need escaping are never added, so that a name
+# wrapped in `safe` can't be confused with the same name unwrapped.
+_tags = {}
+_attr_keys = {}
+INTERN_TABLE_SIZE = 2048
+
+
+def _intern_tag(tag):
+    is_void = tag.lower() in VOID_ELEMENTS
+    escaped = _esc(tag)
+    end = " />" if is_void else ">"
+    parts = (f"<{escaped}", end, f"<{escaped}{end}", "" if is_void else f"</{escaped}>")
+    if escaped == tag and len(_tags) < INTERN_TABLE_SIZE:
+        _tags[tag] = parts
+    return parts
+
 
-    return safe(s)
+def _intern_attr_key(key):
+    escaped = _esc(key)
+    parts = (f" {escaped}", f' {escaped}="')
+    if escaped == key and len(_attr_keys) < INTERN_TABLE_SIZE:
+        _attr_keys[key] = parts
+    return parts
 
 
-def _render(*, tree_or_text_or_callable, context, indent, level, is_root):
+for _name in (
+    "a,abbr,address,area,article,aside,audio,b,base,bdi,bdo,blockquote,body,br,"
+    "button,canvas,caption,cite,code,col,colgroup,data,datalist,dd,del,details,"
+    "dfn,dialog,div,dl,dt,em,embed,fieldset,figcaption,figure,footer,form,h1,h2,"
+    "h3,h4,h5,h6,head,header,hgroup,hr,html,i,iframe,img,input,ins,kbd,label,"
+    "legend,li,link,main,map,mark,menu,meta,meter,nav,noscript,object,ol,"
+    "optgroup,option,output,p,param,picture,pre,progress,q,rp,rt,ruby,s,samp,"
+    "script,search,section,select,slot,small,source,span,strong,style,sub,"
+    "summary,sup,table,tbody,td,template,textarea,tfoot,th,thead,time,title,tr,"
+    "track,u,ul,var,video,wbr,svg,path,g,circle,rect,line,polyline,polygon,use"
+).split(","):
+    _intern_tag(_name)
+
+for _name in (
+    "accept,action,alt,autocomplete,autofocus,checked,class,cols,colspan,content,"
+    "d,data,datetime,defer,disabled,download,enctype,fill,for,height,hidden,href,"
+    "hreflang,id,lang,loading,max,maxlength,media,method,min,minlength,multiple,"
+    "name,novalidate,pattern,placeholder,property,readonly,rel,required,role,"
+    "rows,rowspan,sizes,selected,span,src,srcset,step,stroke,style,tabindex,"
+    "target,title,type,value,viewBox,width,xmlns"
+).split(","):
+    _intern_attr_key(_name)
+
+del _name
+
+
+def _tag(tag, attrs):
+    start, end, opener, closer = _tags.get(tag) or _intern_tag(tag)
+    if not attrs:
+        return opener, closer
+    rendered = []
+    for key, value in attrs.items():
+        bare, prefix = _attr_keys.get(key) or _intern_attr_key(key)
+        rendered.append(bare if value == "" else f'{prefix}{_esc(value)}"')
+    return f"{start}{''.join(rendered)}{end}", closer
+
+
+def _is_immutable(node):
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, str) or type(node) is static:
+            continue
+        # Subclasses of static (compiled and memoized components, for
+        # example) can depend on the context.
+        if callable(node) or isinstance(node, static):
+            return False
+        if not node:
+            continue
+        if type(node) is not tuple and type(node) is not Element:
+            return False
+        children = node[2]
+        if not isinstance(children, (tuple, str)):
+            return False
+        stack.extend(children)
+    return True
+
+
+def _strip_newlines(fragments):
+    """
+    Strip leading and trailing newlines from a stream of fragments, as
+    `render` does for the whole output string.
+    Trailing newlines are held back until a later fragment shows that they
+    are not at the very end of the output.
+    """
+    pending = ""
+    started = False
+    for fragment in fragments:
+        if not started:
+            if fragment.startswith("\n"):
+                fragment = fragment.lstrip("\n")
+            if not fragment:
+                continue
+            started = True
+        if not pending and not fragment.endswith("\n"):
+            # Fragments that don't need stripping are passed on as they are,
+            # so that the output of `static` subclasses keeps its type.
+            yield fragment
+            continue
+        fragment = pending + fragment
+        stripped = fragment.rstrip("\n")
+        pending = "\n" * (len(fragment) - len(stripped))
+        if stripped:
+            yield stripped
+
+
+def _qualname(component):
+    return getattr(component, "__qualname__", None) or type(component).__qualname__
+
+
+def _count_bytes(fragments, profiler):
+    for fragment in fragments:
+        profiler.bytes += len(fragment)
+        yield fragment
+
+
+def _render_iter(
+    node, context, indent, level=0, static_cache=None, profiler=None, limiter=None
+):
+    """
+    Render a node as a stream of fragments, without stripping newlines from
+    the ends of the output.
+
+    The tree is walked with an explicit stack rather than by recursion, so
+    the depth of the tree is not limited by the interpreter's recursion
+    limit. Each stack frame holds the iterator over an element's children,
+    the nesting level and indentation of those children, the whitespace and
+    closing tag to emit after them, and whether any of them produced output.
+
+    If a profiler is given, every frame pushed onto the stack is also entered
+    in the profiler, and exited when the frame is popped. When profiling,
+    the node returned by a context callable gets a frame of its own, so that
+    the time spent rendering it is attributed to the callable. The same
+    goes for a limiter, which also counts every node.
+    """
     breaker = "\n" if indent else ""
     indenter = " " * indent * level
-    tree_or_text = (
-        tree_or_text_or_callable(context)
-        if callable(tree_or_text_or_callable)
-        else tree_or_text_or_callable
+    stack = [[iter((node,)), level, indenter, breaker + indenter, "", "", False]]
+    while stack:
+        frame = stack[-1]
+        for child in frame[0]:
+            if limiter is not None:
+                limiter.node()
+            if callable(child):
+                if profiler is not None or limiter is not None:
+                    if profiler is not None:
+                        profiler.enter("component", _qualname(child), len(stack))
+                    if limiter is not None:
+                        limiter.enter(_qualname(child))
+                    child = child(context)
+                    stack.append(
+                        [iter((child,)), frame[1], frame[2], frame[3], "", "", False]
+                    )
+                    break
+                child = child(context)
+            if not child:
+                continue
+            if isinstance(child, str):
+                frame[6] = True
+                yield frame[3] + _esc(child)
+                continue
+            if isinstance(child, static):
+                rendered = child._render(context, indent, frame[1])
+                if rendered:
+                    frame[6] = True
+                    yield rendered
+                continue
+            tag, attrs, children = child
+            if static_cache is not None and type(children) is tuple:
+                rendered = static_cache._render(child, context, indent, frame[1])
+                if rendered is not None:
+                    if rendered:
+                        frame[6] = True
+                        yield rendered
+                    continue
+            if profiler is not None:
+                profiler.enter("tag", tag, len(stack))
+            if limiter is not None:
+                limiter.enter(tag)
+            if tag:
+                opener, closer = _tag(tag, attrs)
+                frame[6] = True
+                yield frame[3] + opener
+                level = frame[1] + 1
+                indenter = " " * indent * level
+                stack.append(
+                    [
+                        iter(children),
+                        level,
+                        indenter,
+                        breaker + indenter,
+                        frame[3],
+                        closer,
+                        False,
+                    ]
+                )
+            else:
+                indenter = frame[2]
+                if indenter:
+                    frame[6] = True
+                    yield indenter
+                stack.append(
+                    [iter(children), frame[1], indenter, frame[3], indenter, "", False]
+                )
+            break
+        else:
+            stack.pop()
+            closing = frame[4] + frame[5] if frame[6] else frame[5]
+            if closing:
+                yield closing
+            if stack:
+                if frame[6] or closing:
+                    stack[-1][6] = True
+                if profiler is not None:
+                    profiler.exit()
+                if limiter is not None:
+                    limiter.exit()
+
+
+# Minification follows https://html.spec.whatwg.org/#syntax: whitespace is
+# preserved inside these elements, attribute values can be left unquoted if
+# they contain none of these characters, and the end tags of these elements
+# can be left out when they are followed by one of the listed elements, or
+# by the end of their parent (unless the parent is one of MINIFY_P_PARENTS,
+# for "p").
+MINIFY_PRESERVE = set("pre,textarea,script,style".split(","))
+MINIFY_UNQUOTABLE = set(" \t\n\f\r\"'=<>`")
+MINIFY_OPTIONAL_END = {
+    "li": {"li"},
+    "td": {"td", "th"},
+    "tr": {"tr"},
+    "p": set(
+        "address,article,aside,blockquote,details,dialog,div,dl,fieldset,"
+        "figcaption,figure,footer,form,h1,h2,h3,h4,h5,h6,header,hgroup,hr,main,"
+        "menu,nav,ol,p,pre,search,section,table,ul".split(",")
+    ),
+}
+MINIFY_P_PARENTS = set("a,audio,del,ins,map,noscript,video".split(","))
+
+
+def _collapse(s):
+    """
+    Collapse runs of HTML whitespace (not all Unicode whitespace, which
+    would include non-breaking spaces) into single spaces.
+    """
+    if (
+        "  " not in s
+        and "\n" not in s
+        and "\t" not in s
+        and "\r" not in s
+        and "\f" not in s
+    ):
+        return s
+    parts = [
+        part
+        for part in s.replace("\t", " ")
+        .replace("\n", " ")
+        .replace("\r", " ")
+        .replace("\f", " ")
+        .split(" ")
+        if part
+    ]
+    if not parts:
+        return " "
+    collapsed = " ".join(parts)
+    if s[0] in " \t\n\r\f":
+        collapsed = " " + collapsed
+    if s[-1] in " \t\n\r\f":
+        collapsed += " "
+    return collapsed
+
+
+def _minified_tag(tag, attrs):
+    start, _, _, closer = _tags.get(tag) or _intern_tag(tag)
+    if not attrs:
+        return start + ">", closer
+    rendered = [start]
+    for key, value in attrs.items():
+        bare, prefix = _attr_keys.get(key) or _intern_attr_key(key)
+        if value == "":
+            rendered.append(bare)
+        elif MINIFY_UNQUOTABLE.isdisjoint(value):
+            rendered.append(f"{bare}={_esc(value)}")
+        else:
+            rendered.append(f'{prefix}{_esc(value)}"')
+    rendered.append(">")
+    return "".join(rendered), closer
+
+
+def _render_minified(node, context, omit_optional_tags):
+    """
+    Render a node as a stream of minified fragments. This works like
+    `_render_iter` without indentation, but each stack frame holds the
+    iterator over an element's children, its tag and closing tag, whether
+    whitespace is preserved inside it, and a one-item list holding the tag
+    and closing tag of a child whose end tag has been left out for now, in
+    case it's followed by an element that makes it optional. Fragments share
+    that list with their parent, because their children are its children.
+    """
+    root = [None]
+    stack = [[iter((node,)), "", "", False, root]]
+    while stack:
+        frame = stack[-1]
+        for child in frame[0]:
+            if callable(child):
+                child = child(context)
+            if not child:
+                continue
+            pending = frame[4]
+            if isinstance(child, static):
+                tree = child._tree(context)
+                if tree is not None:
+                    stack.append([iter((tree,)), "", "", frame[3], pending])
+                    break
+            tag = None if isinstance(child, (str, static)) else child[0]
+            # Fragments are transparent, so they leave the end tag pending.
+            if pending[0] is not None and tag != "":
+                if tag not in MINIFY_OPTIONAL_END[pending[0][0]]:
+                    yield pending[0][1]
+                pending[0] = None
+            if isinstance(child, str):
+                if frame[3] or isinstance(child, safe):
+                    yield _esc(child)
+                else:
+                    yield _esc(_collapse(child))
+                continue
+            if isinstance(child, static):
+                yield child._render(context, 0, 0)
+                continue
+            tag, attrs, children = child
+            if tag:
+                opener, closer = _minified_tag(tag, attrs)
+                yield opener
+                preserve = frame[3] or tag in MINIFY_PRESERVE
+                if not preserve and not tag.islower():
+                    preserve = tag.lower() in MINIFY_PRESERVE
+                stack.append([iter(children), tag, closer, preserve, [None]])
+            else:
+                stack.append([iter(children), "", "", frame[3], pending])
+            break
+        else:
+            stack.pop()
+            tag = frame[1]
+            if not tag:
+                continue
+            pending = frame[4][0]
+            if pending is not None and (
+                pending[0] != "p" or tag not in MINIFY_P_PARENTS
+            ):
+                pending = None
+            if pending is not None:
+                yield pending[1]
+            if omit_optional_tags and tag in MINIFY_OPTIONAL_END:
+                stack[-1][4][0] = (tag, frame[2])
+            elif frame[2]:
+                yield frame[2]
+    if root[0] is not None:
+        yield root[0][1]
+
+
+def render_iter(
+    node,
+    context=None,
+    indent=0,
+    static_cache=None,
+    profiler=None,
+    minify=False,
+    omit_optional_tags=False,
+    limits=None,
+):
+    """
+    Render the node as a sequence of string fragments in document order.
+    Joining the fragments gives exactly the same result as `render`.
+    """
+    context = context or {}
+    if minify:
+        if profiler is not None or limits is not None:
+            raise ValueError("A profiler or limits can't be used with minify=True")
+        if callable(node):
+            node = node(context)
+        yield from _render_minified(node, context, omit_optional_tags)
+        return
+    limiter = None if limits is None else limits._start()
+    component = None
+    if callable(node):
+        if profiler is not None or limiter is not None:
+            component = _qualname(node)
+            if profiler is not None:
+                profiler.enter("component", component, 0)
+            if limiter is not None:
+                limiter.enter(component)
+        node = node(context)
+    fragments = _render_iter(
+        node,
+        context,
+        indent,
+        static_cache=static_cache,
+        profiler=profiler,
+        limiter=limiter,
     )
-    if not tree_or_text:
-        return ""
-    if isinstance(tree_or_text, str):
-        return f"{breaker}{indenter}{_esc(tree_or_text)}"
-    tag, attrs, children = tree_or_text
-    breaker = breaker if tag else ""
-    attrs = (
-        (
-            " "
-            + " ".join(
-                _esc(k) if v == "" else f'{_esc(k)}="{_esc(v)}"'
-                for k, v in attrs.items()
+    if profiler is not None:
+        fragments = _count_bytes(fragments, profiler)
+    if limiter is not None:
+        fragments = limiter.count(fragments)
+    # Like `render`, only strip the output of a root tree node, not text.
+    yield from fragments if isinstance(node, str) else _strip_newlines(fragments)
+    if component is not None and profiler is not None:
+        profiler.exit()
+
+
+def render(
+    node,
+    context=None,
+    indent=0,
+    static_cache=None,
+    profiler=None,
+    minify=False,
+    omit_optional_tags=False,
+    limits=None,
+):
+    """
+    Render the node as a string of HTML.
+
+    With `minify=True`, the output is made as small as possible without
+    changing what it means: `indent` is ignored, runs of whitespace in text
+    are collapsed to a single space (except inside `pre`, `textarea`,
+    `script` and `style`, and in `safe` strings), attribute values are only
+    quoted when they need to be, and void elements are written without
+    " /". With `omit_optional_tags=True` as well, the end tags of `li`,
+    `p`, `td` and `tr` elements are left out where the HTML spec allows.
+    `static` nodes (including memoized and compiled components) are
+    rendered again each time from their trees, `static_cache` isn't used,
+    and a profiler or limits can't be used.
+
+    Pass `RenderLimits` as `limits` to stop the render with a
+    `RenderLimitExceeded` error if it goes over any of them.
+    """
+    if profiler is not None or minify or limits is not None:
+        return "".join(
+            render_iter(
+                node,
+                context,
+                indent,
+                static_cache,
+                profiler,
+                minify,
+                omit_optional_tags,
+                limits,
             )
         )
-        if attrs
-        else ""
-    )
-    is_void = tag.lower() in VOID_ELEMENTS
-    self_closer = " /" if is_void else ""
-    opener = f"<{_esc(tag)}{attrs}{self_closer}>" if tag else ""
-    closer = f"</{_esc(tag)}>" if (tag and not is_void) else ""
-    next_level = level + 1 if tag else level
-    children = "".join(
-        _render(
-            tree_or_text_or_callable=child,
-            context=context,
-            indent=indent,
-            level=next_level,
-            is_root=False,
-        )
-        for child in children
-    )
-    contents = f"{children}{breaker}{indenter}" if children else ""
-    rendered = f"{breaker}{indenter}{opener}{contents}{closer}"
-    return rendered.strip("\n") if is_root else rendered
-
-
-def render(node, context=None, indent=0):
-    return _render(
-        tree_or_text_or_callable=node,
-        context=context or {},
-        indent=indent,
-        level=0,
-        is_root=True,
+    context = context or {}
+    if callable(node):
+        node = node(context)
+    rendered = "".join(_render_iter(node, context, indent, static_cache=static_cache))
+    return rendered if isinstance(node, str) else rendered.strip("\n")
+
+
+def render_into(
+    node,
+    out,
+    encoding="utf-8",
+    context=None,
+    indent=0,
+    buffer_size=65536,
+    static_cache=None,
+    profiler=None,
+    minify=False,
+    omit_optional_tags=False,
+    limits=None,
+):
+    """
+    Render the node into `out`, which can be anything with a `write` method
+    (a file, a socket file, `io.BytesIO`, a gzip stream). Fragments are
+    collected until at least `buffer_size` characters are waiting, then
+    joined, encoded with `encoding` and written in one call, so the whole
+    page is never held in memory at once. If `encoding` is None, strings are
+    written to `out` without being encoded.
+    """
+    buffer = []
+    buffered = 0
+    fragments = render_iter(
+        node,
+        context,
+        indent,
+        static_cache,
+        profiler,
+        minify,
+        omit_optional_tags,
+        limits,
     )
+    for fragment in fragments:
+        buffer.append(fragment)
+        buffered += len(fragment)
+        if buffered >= buffer_size:
+            chunk = "".join(buffer)
+            out.write(chunk if encoding is None else chunk.encode(encoding))
+            buffer.clear()
+            buffered = 0
+    if buffer:
+        chunk = "".join(buffer)
+        out.write(chunk if encoding is None else chunk.encode(encoding))
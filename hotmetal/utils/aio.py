@@ -0,0 +1,98 @@
+from hotmetal import render, render_iter, static
+from inspect import isawaitable
+
+import asyncio
+
+
+class _Awaited:
+    """
+    Stands in for a context callable that returned an awaitable, and returns
+    the awaited node when it is called during rendering.
+    """
+
+    node = None
+
+    def __call__(self, context):
+        return self.node
+
+
+def _resolve(node, context, pending):
+    """
+    Return a copy of the tree with every context callable replaced by the
+    node it returns, calling them in document order. Callables that return
+    awaitables are replaced by an `_Awaited` placeholder instead, and the
+    placeholder and the awaitable are added to `pending`.
+    """
+    root = [None]
+    stack = [(node, root, 0)]
+    while stack:
+        node, target, index = stack.pop()
+        if callable(node):
+            node = node(context)
+            if isawaitable(node):
+                placeholder = _Awaited()
+                pending.append((placeholder, node))
+                node = placeholder
+        if not node or isinstance(node, (str, static, _Awaited)):
+            target[index] = node
+            continue
+        tag, attrs, children = node
+        children = list(children)
+        target[index] = (tag, attrs, children)
+        stack.extend(
+            (child, children, index)
+            for index, child in reversed([*enumerate(children)])
+        )
+    return root[0]
+
+
+async def _await_all(pending, context, semaphore):
+    await asyncio.gather(
+        *(
+            _await(placeholder, awaitable, context, semaphore)
+            for placeholder, awaitable in pending
+        )
+    )
+
+
+async def _await(placeholder, awaitable, context, semaphore):
+    if semaphore is None:
+        node = await awaitable
+    else:
+        async with semaphore:
+            node = await awaitable
+    pending = []
+    placeholder.node = _resolve(node, context, pending)
+    await _await_all(pending, context, semaphore)
+
+
+async def _resolve_async(node, context, concurrency):
+    semaphore = asyncio.Semaphore(concurrency) if concurrency else None
+    pending = []
+    tree = _resolve(node, context, pending)
+    await _await_all(pending, context, semaphore)
+    return tree
+
+
+async def render_async(node, context=None, indent=0, concurrency=None):
+    """
+    Render the node like `render`, but allow context callables to return
+    awaitables (for example, by being `async` functions). All of the
+    awaitables in the tree are awaited concurrently, at most `concurrency`
+    at a time if it is given, before the page is rendered.
+    """
+    context = context or {}
+    tree = await _resolve_async(node, context, concurrency)
+    return render(tree, context, indent)
+
+
+async def render_iter_async(node, context=None, indent=0, concurrency=None):
+    """
+    Asynchronous version of `render_iter`, for use with `async for` in
+    ASGI applications. Like `render_async`, context callables may return
+    awaitables.
+    """
+    context = context or {}
+    tree = await _resolve_async(node, context, concurrency)
+    for fragment in render_iter(tree, context, indent):
+        yield fragment
@@ -1,12 +1,35 @@
-def classnames(*args):
-    classes = []
+# Results for calls whose arguments are all strings or None, which are the
+# only arguments that are hashable without being confused with each other
+# (True == 1 == 1.0, but they give different class names). The cache is
+# simply emptied when it fills up.
+_cache = {}
+CACHE_SIZE = 1024
+
+
+def _collect(args, classes):
     for arg in args:
-        if isinstance(arg, bool):
+        kind = type(arg)
+        if kind is str:
+            arg = arg.strip()
+            if arg:
+                classes.append(arg)
+        elif kind is dict:
+            classes.extend(key for key, value in arg.items() if value)
+        elif kind is bool or arg is None:
             continue
-        if isinstance(arg, dict):
-            for key, value in arg.items():
-                if value:
-                    classes.append(key)
+        elif kind is int or kind is float:
+            if arg:
+                classes.append(str(arg))
+        elif kind is list or kind is set:
+            child = classnames(*arg)
+            if child:
+                classes.append(child)
+        # Subclasses of the types above are handled in the same way, but
+        # after the exact type checks, which are faster.
+        elif isinstance(arg, bool):
+            continue
+        elif isinstance(arg, dict):
+            classes.extend(key for key, value in arg.items() if value)
         elif isinstance(arg, str) and arg.strip():
             classes.append(arg.strip())
         elif isinstance(arg, (int, float)) and arg:
@@ -15,4 +38,81 @@ def classnames(*args):
             child = classnames(*arg)
             if child:
                 classes.append(child)
-    return " ".join(classes)
+
+
+def classnames(*args):
+    for arg in args:
+        if type(arg) is not str and arg is not None:
+            classes = []
+            _collect(args, classes)
+            return " ".join(classes)
+    result = _cache.get(args)
+    if result is None:
+        classes = []
+        _collect(args, classes)
+        result = " ".join(classes)
+        if len(_cache) >= CACHE_SIZE:
+            _cache.clear()
+        _cache[args] = result
+    return result
+
+
+class CompiledClassnames:
+    """
+    Class names for arguments that are the same every time except for some
+    boolean flags, created with `classnames.compile`. Values of `...` in
+    dicts are flags, which are given by keyword when the compiled class
+    names are called. Everything else is fixed when compiled. The result
+    for each combination of flags is computed once.
+    """
+
+    def __init__(self, *args):
+        self.flags = []
+        # Each part is either a fixed string or the index of a flag.
+        self.parts = []
+        for arg in args:
+            if type(arg) is dict and ... in arg.values():
+                for key, value in arg.items():
+                    if value is ...:
+                        self.parts.append(len(self.flags))
+                        self.flags.append(key)
+                    elif value:
+                        self.parts.append(key)
+            else:
+                fixed = classnames(arg)
+                if fixed:
+                    self.parts.append(fixed)
+        self.results = {}
+
+    def _result(self, mask):
+        result = self.results.get(mask)
+        if result is None:
+            classes = []
+            for part in self.parts:
+                if type(part) is str:
+                    classes.append(part)
+                elif mask[part]:
+                    classes.append(self.flags[part])
+            result = self.results[mask] = " ".join(classes)
+        return result
+
+    def __call__(self, **flags):
+        return self._result(tuple(bool(flags.get(flag)) for flag in self.flags))
+
+    def many(self, rows):
+        """
+        Return the class names for each of a sequence of mappings of flags.
+        """
+        flags = self.flags
+        result = self._result
+        return [result(tuple(bool(row.get(flag)) for flag in flags)) for row in rows]
+
+
+classnames.compile = CompiledClassnames
+
+
+def classnames_many(rows):
+    """
+    Return the class names for each of a sequence of argument tuples.
+    """
+    return [classnames(*row) for row in rows]
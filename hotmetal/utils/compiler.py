@@ -0,0 +1,546 @@
+from functools import wraps
+from hotmetal import (
+    _attr_keys,
+    _esc,
+    _intern_attr_key,
+    _intern_tag,
+    _render_iter,
+    _tag,
+    _tags,
+    Element,
+    static,
+)
+from inspect import Parameter, signature
+
+import builtins
+import dis
+import re
+import types
+
+_MARKER = re.compile("\x00S([0-9]+)s([0-9]+)\x00")
+
+# Builtins that look at a value (or at the string an argument was formatted
+# into) without going through a method that a placeholder can intercept.
+_INSPECTORS = {
+    getattr(builtins, name)
+    for name in [
+        "all",
+        "any",
+        "ascii",
+        "bool",
+        "callable",
+        "float",
+        "getattr",
+        "hasattr",
+        "hash",
+        "id",
+        "int",
+        "isinstance",
+        "issubclass",
+        "len",
+        "max",
+        "min",
+        "ord",
+        "repr",
+        "sorted",
+        "sum",
+        "type",
+        "vars",
+    ]
+}
+
+
+class _Untraceable(Exception):
+    pass
+
+
+def _inspects_values(fn):
+    """
+    Return True if the code of a component (or of a function it calls)
+    compares values, branches, or uses a builtin that inspects values. None
+    of those can be intercepted while tracing: `x is None` is simply False
+    for a placeholder, and `len(f"{x}")` measures the placeholder's marker,
+    so the trace would silently take the same branch for every argument.
+    Nested functions and comprehensions are only checked if they can see
+    the component's variables.
+    """
+    if type(fn) is not types.FunctionType:
+        return True
+    seen = {fn.__code__}
+    stack = [(fn.__code__, fn.__globals__)]
+    while stack:
+        code, namespace = stack.pop()
+        for instruction in dis.get_instructions(code):
+            name = instruction.opname
+            if name in ("COMPARE_OP", "IS_OP", "CONTAINS_OP") or "_IF_" in name:
+                return True
+            if name not in ("LOAD_GLOBAL", "LOAD_NAME"):
+                continue
+            value = namespace.get(
+                instruction.argval, getattr(builtins, instruction.argval, None)
+            )
+            if isinstance(value, type):
+                if issubclass(value, str) or value in _INSPECTORS:
+                    return True
+            elif isinstance(value, types.BuiltinFunctionType):
+                if value in _INSPECTORS:
+                    return True
+            elif type(value) is types.FunctionType and value.__code__ not in seen:
+                seen.add(value.__code__)
+                stack.append((value.__code__, value.__globals__))
+        for constant in code.co_consts:
+            if (
+                isinstance(constant, types.CodeType)
+                and constant.co_freevars
+                and constant not in seen
+            ):
+                seen.add(constant)
+                stack.append((constant, namespace))
+    return False
+
+
+class _Slot:
+    """
+    Stands in for an argument while a component is traced. It can be used
+    directly as a node or an attribute value, or inside an f-string or a
+    string concatenation (which leave a marker in the resulting string).
+    Anything else would make the structure of the tree depend on the value
+    of the argument, so it stops the trace. Comparisons and builtins such as
+    `type()` or `len()` can't be intercepted here, so components that use
+    them are found by `_inspects_values` and never traced.
+    """
+
+    def __init__(self, tracer, index):
+        self._tracer = tracer
+        self._index = index
+
+    def __format__(self, spec):
+        return self._tracer.marker(self._index, spec)
+
+    def __str__(self):
+        return self.__format__("")
+
+    def __add__(self, other):
+        if not isinstance(other, str):
+            raise _Untraceable()
+        return str(self) + other
+
+    def __radd__(self, other):
+        if not isinstance(other, str):
+            raise _Untraceable()
+        return other + str(self)
+
+    def __getattr__(self, name):
+        raise _Untraceable()
+
+    def _untraceable(self, *args):
+        raise _Untraceable()
+
+    __bool__ = __len__ = __iter__ = __getitem__ = __contains__ = _untraceable
+    __eq__ = __ne__ = __lt__ = __le__ = __gt__ = __ge__ = __hash__ = _untraceable
+    __int__ = __float__ = __index__ = __call__ = __repr__ = _untraceable
+    __class__ = property(_untraceable)
+
+
+class _Tracer:
+    def __init__(self):
+        self.specs = []
+
+    def marker(self, index, spec):
+        # The marker mixes upper and lower case, so that string methods such
+        # as .upper() leave a broken marker behind, which is detected later.
+        self.specs.append(spec)
+        return f"\x00S{index}s{len(self.specs) - 1}\x00"
+
+
+def _attr(bare, prefix, value):
+    return bare if value == "" else f'{prefix}{_esc(value)}"'
+
+
+def _close(body, closing):
+    return body + closing if body else ""
+
+
+def _text(prefix, value):
+    return prefix + _esc(value) if value else ""
+
+
+def _node(node, prefix, context, indent, level):
+    if isinstance(node, str):
+        return prefix + _esc(node) if node else ""
+    return "".join(_render_iter(node, context, indent, level))
+
+
+def _children(children, prefix, context, indent, level):
+    return "".join(_node(child, prefix, context, indent, level) for child in children)
+
+
+class _Generator:
+    """
+    Generates the source of a function that renders a traced tree at a
+    particular indentation setting and nesting level, following the same
+    rules as `hotmetal._render_iter`. The function body is a single
+    expression. Parts of it are kept as a list of items, each of which is
+    either a constant string or a (code, may_be_empty) pair.
+    """
+
+    def __init__(self, tracer, indent):
+        self.tracer = tracer
+        self.indent = indent
+        self.breaker = "\n" if indent else ""
+        self.constants = {}
+
+    def constant(self, value):
+        name = f"c{len(self.constants)}"
+        self.constants[name] = value
+        return name
+
+    def code(self, items):
+        return " + ".join(
+            repr(item) if isinstance(item, str) else item[0] for item in items
+        ) or repr("")
+
+    def string(self, value):
+        """
+        Return the static pieces and the code for the argument values that
+        make up a string with markers in it.
+        """
+        pieces = []
+        position = 0
+        for match in _MARKER.finditer(value):
+            pieces.append(value[position : match.start()])
+            spec = self.tracer.specs[int(match[2])]
+            pieces.append((f"_format(a{match[1]}, {spec!r})", True))
+            position = match.end()
+        pieces.append(value[position:])
+        if any("\x00" in piece for piece in pieces if isinstance(piece, str)):
+            raise _Untraceable()
+        return [piece for piece in pieces if piece != ""]
+
+    def node(self, node, level):
+        indenter = " " * self.indent * level
+        prefix = self.breaker + indenter
+        if isinstance(node, _Slot):
+            return [
+                (
+                    f"_node(a{node._index}, {prefix!r}, context, {self.indent}, {level})",
+                    True,
+                )
+            ]
+        if isinstance(node, static):
+            # Static nodes don't depend on the context, so they can be rendered
+            # now.
+            return [node._render({}, self.indent, level)]
+        if (
+            type(node) is types.FunctionType
+            and node.__closure__ is None
+            and not node.__defaults__
+            and not node.__kwdefaults__
+        ):
+            # A plain function can't hold on to an argument, so it can be
+            # called at render time. Partials, bound methods and other
+            # callable objects might, so they stop the trace.
+            name = self.constant(node)
+            return [(f"_node({name}, '', context, {self.indent}, {level})", True)]
+        if callable(node):
+            raise _Untraceable()
+        if not node:
+            return []
+        if isinstance(node, str):
+            pieces = self.string(node)
+            if all(isinstance(piece, str) for piece in pieces):
+                return [prefix + _esc(node)]
+            value = " + ".join(
+                repr(piece) if isinstance(piece, str) else piece[0] for piece in pieces
+            )
+            if any(isinstance(piece, str) for piece in pieces):
+                return [
+                    prefix,
+                    *(
+                        (
+                            _esc(piece)
+                            if isinstance(piece, str)
+                            else (f"_esc({piece[0]})", False)
+                        )
+                        for piece in pieces
+                    ),
+                ]
+            return [(f"_text({prefix!r}, {value})", True)]
+        tag, attrs, children = node
+        if isinstance(tag, _Slot) or isinstance(attrs, _Slot):
+            raise _Untraceable()
+        if tag:
+            if "\x00" in tag:
+                raise _Untraceable()
+            items = [prefix, *self.opener(tag, attrs)]
+            closer = _tag(tag, {})[1]
+            child_level = level + 1
+            closing = prefix
+        else:
+            items = [indenter]
+            closer = ""
+            child_level = level
+            closing = indenter
+        if isinstance(children, _Slot):
+            body = [
+                (
+                    f"_children(a{children._index}, {self.breaker + ' ' * self.indent * child_level!r}, context, {self.indent}, {child_level})",
+                    True,
+                )
+            ]
+        else:
+            body = [
+                item for child in children for item in self.node(child, child_level)
+            ]
+        if any(item if isinstance(item, str) else not item[1] for item in body):
+            items.extend([*body, closing + closer])
+        elif not body:
+            items.append(closer)
+        elif not closing:
+            items.extend([*body, closer])
+        else:
+            items.extend([(f"_close({self.code(body)}, {closing!r})", True), closer])
+        return [item for item in items if item != ""]
+
+    def opener(self, tag, attrs):
+        if not any(
+            isinstance(value, _Slot) or "\x00" in value for value in attrs.values()
+        ):
+            return [_tag(tag, attrs)[0]]
+        start, end, _, _ = _tags.get(tag) or _intern_tag(tag)
+        items = [start]
+        for key, value in attrs.items():
+            if "\x00" in key:
+                raise _Untraceable()
+            bare, prefix = _attr_keys.get(key) or _intern_attr_key(key)
+            if isinstance(value, _Slot):
+                items.append((f"_attr({bare!r}, {prefix!r}, a{value._index})", False))
+                continue
+            pieces = self.string(value)
+            if all(isinstance(piece, str) for piece in pieces):
+                items.append(bare if value == "" else f'{prefix}{_esc(value)}"')
+            elif any(isinstance(piece, str) for piece in pieces):
+                items.append(prefix)
+                items.extend(
+                    (
+                        _esc(piece)
+                        if isinstance(piece, str)
+                        else (f"_esc({piece[0]})", False)
+                    )
+                    for piece in pieces
+                )
+                items.append('"')
+            else:
+                value = " + ".join(piece[0] for piece in pieces)
+                items.append((f"_attr({bare!r}, {prefix!r}, {value})", False))
+        items.append(end)
+        return items
+
+    def function(self, tree, level, arguments):
+        source = (
+            f"def render({', '.join(arguments)}, context):\n"
+            f"    return {self.code(self.node(tree, level))}\n"
+        )
+        namespace = {
+            "_attr": _attr,
+            "_children": _children,
+            "_close": _close,
+            "_esc": _esc,
+            "_format": format,
+            "_node": _node,
+            "_text": _text,
+            **self.constants,
+        }
+        exec(compile(source, "<hotmetal compiled component>", "exec"), namespace)
+        return namespace["render"]
+
+
+class _Template:
+    def __init__(self, tree, tracer, arguments):
+        self.tree = tree
+        self.tracer = tracer
+        self.arguments = arguments
+        self.functions = {}
+
+    def function(self, indent, level):
+        key = (indent, level)
+        function = self.functions.get(key)
+        if function is None:
+            generator = _Generator(self.tracer, indent)
+            function = generator.function(self.tree, level, self.arguments)
+            self.functions[key] = function
+        return function
+
+
+class _CompiledNode(static):
+    def __init__(self, component, template, values):
+        self.component = component
+        self.template = template
+        self.values = values
+
+    def _render(self, context, indent, level):
+        try:
+            return self.template.function(indent, level)(*self.values, context)
+        except _Untraceable:
+            # Generating code for a new indentation setting or level can
+            # still find something that can't be traced.
+            component = self.component
+            component.template = None
+            component.traceable = False
+            tree = component.call(self.values)
+            return "".join(_render_iter(tree, context, indent, level))
+
+    def _tree(self, context):
+        return self.component.call(self.values)
+
+
+class _Component:
+    """
+    Traces a component the first time it is called, and remembers the
+    template, or that the component can't be traced.
+    """
+
+    def __init__(self, fn, parameters):
+        self.fn = fn
+        self.parameters = parameters
+        self.template = None
+        self.traceable = all(
+            parameter.kind
+            in (
+                Parameter.POSITIONAL_ONLY,
+                Parameter.POSITIONAL_OR_KEYWORD,
+                Parameter.KEYWORD_ONLY,
+            )
+            for parameter in parameters
+        )
+
+    def call(self, values):
+        """
+        Call the original component with argument values in the order of
+        its parameters.
+        """
+        args = []
+        kwargs = {}
+        for value, parameter in zip(values, self.parameters):
+            if parameter.kind is Parameter.KEYWORD_ONLY:
+                kwargs[parameter.name] = value
+            else:
+                args.append(value)
+        return self.fn(*args, **kwargs)
+
+    def trace(self):
+        if not self.traceable:
+            return None
+        tracer = _Tracer()
+        slots = [_Slot(tracer, index) for index in range(len(self.parameters))]
+        args = [
+            slot
+            for slot, parameter in zip(slots, self.parameters)
+            if parameter.kind is not Parameter.KEYWORD_ONLY
+        ]
+        kwargs = {
+            parameter.name: slot
+            for slot, parameter in zip(slots, self.parameters)
+            if parameter.kind is Parameter.KEYWORD_ONLY
+        }
+        arguments = [f"a{index}" for index in range(len(self.parameters))]
+        try:
+            tree = self.fn(*args, **kwargs)
+            # `render` doesn't strip newlines from text at the root, so only
+            # components that return an element are compiled.
+            if type(tree) is not tuple and type(tree) is not Element:
+                raise _Untraceable()
+            template = _Template(tree, tracer, arguments)
+            # Generate code for one setting up front, so that untraceable trees
+            # are found now rather than in the middle of rendering.
+            template.function(0, 0)
+        except (_Untraceable, TypeError, ValueError, AttributeError):
+            self.traceable = False
+            return None
+        self.template = template
+        return template
+
+
+def _wrapper_source(parameters):
+    """
+    Generate the source of a function with the same parameters as the
+    component, so that arguments are bound by Python itself rather than by
+    `inspect.Signature.bind` on every call. The names used by the function
+    itself all start with "_hotmetal_", so that they don't clash with the
+    names of the parameters.
+    """
+    definition = []
+    positional = []
+    keyword = []
+    for index, parameter in enumerate(parameters):
+        if parameter.kind is Parameter.KEYWORD_ONLY:
+            if not keyword:
+                definition.append("*")
+            keyword.append(f"{parameter.name}={parameter.name}")
+        else:
+            positional.append(parameter.name)
+        if parameter.default is Parameter.empty:
+            definition.append(parameter.name)
+        else:
+            definition.append(f"{parameter.name}=_hotmetal_default_{index}")
+        if parameter.kind is Parameter.POSITIONAL_ONLY and (
+            index + 1 == len(parameters)
+            or parameters[index + 1].kind is not Parameter.POSITIONAL_ONLY
+        ):
+            definition.append("/")
+    values = "".join(f"{parameter.name}, " for parameter in parameters)
+    return (
+        f"def compiled({', '.join(definition)}):\n"
+        "    _hotmetal_template = (\n"
+        "        _hotmetal_component.template or _hotmetal_component.trace()\n"
+        "    )\n"
+        "    if _hotmetal_template is None:\n"
+        f"        return _hotmetal_component.fn({', '.join(positional + keyword)})\n"
+        "    return _hotmetal_CompiledNode(\n"
+        f"        _hotmetal_component, _hotmetal_template, ({values})\n"
+        "    )\n"
+    )
+
+
+def compile_component(fn):
+    """
+    Compile a component function into specialised code that renders its
+    output without walking the tree.
+
+    The component is called once (the first time the compiled component is
+    called) with placeholders for its arguments, to find out which parts of
+    the tree it returns are always the same, and where the arguments end up:
+    as text or child nodes, attribute values, a list of children, or inside
+    f-strings or string concatenations. Python code is then generated (for
+    each indentation setting and nesting level it is rendered at) that joins
+    precomputed strings with the escaped argument values. Calling the
+    compiled component returns a node that can be used anywhere in a tree.
+
+    If the component does anything else with its arguments (such as looping
+    over them or calling methods on them), its structure depends on their
+    values, and the compiled component simply calls the original one
+    instead. Components whose code (or the code of the functions they call)
+    compares values, branches, or uses builtins such as `len`, `str`,
+    `type` or `isinstance` aren't compiled at all: `compile_component`
+    returns them unchanged. The component must be a pure function of its
+    arguments.
+    """
+    parameters = list(signature(fn).parameters.values())
+    component = _Component(fn, parameters)
+    if not component.traceable or _inspects_values(fn):
+        return fn
+    namespace = {
+        "_hotmetal_component": component,
+        "_hotmetal_CompiledNode": _CompiledNode,
+        **{
+            f"_hotmetal_default_{index}": parameter.default
+            for index, parameter in enumerate(parameters)
+        },
+    }
+    exec(
+        compile(_wrapper_source(parameters), "<hotmetal compiled component>", "exec"),
+        namespace,
+    )
+    compiled = wraps(fn)(namespace["compiled"])
+    compiled.component = component
+    return compiled
@@ -0,0 +1,151 @@
+from hotmetal import _render_iter, render_iter, safe, static
+
+import struct
+import zlib
+
+# https://www.rfc-editor.org/rfc/rfc1952 (gzip) and rfc1950 (zlib). The
+# headers are written here, rather than by zlib, because zlib's trailers
+# wouldn't cover the precompressed fragments spliced into the stream.
+_GZIP_HEADER = b"\x1f\x8b\x08\x00\x00\x00\x00\x00\x00\xff"
+_ZLIB_HEADER = b"\x78\x9c"
+
+
+class _Precompressed(safe):
+    """
+    The output of a `precompressed` node, along with its UTF-8 encoding and
+    that encoding compressed as a self-contained run of raw deflate blocks,
+    ready to be spliced into a compressed stream.
+    """
+
+
+class precompressed(static):
+    """
+    Like `static`, but the output is also compressed once for each
+    indentation setting and nesting level, so that `render_compressed` can
+    splice it into its output without compressing it again.
+    """
+
+    def __init__(self, node, level=6):
+        super().__init__(node)
+        self.level = level
+
+    def _render(self, context, indent, level):
+        key = (indent, level)
+        try:
+            return self.rendered[key]
+        except KeyError:
+            rendered = _Precompressed(
+                "".join(_render_iter(self.node, context, indent, level))
+            )
+            rendered.data = rendered.encode()
+            compressor = zlib.compressobj(self.level, zlib.DEFLATED, -zlib.MAX_WBITS)
+            rendered.compressed = compressor.compress(rendered.data) + compressor.flush(
+                zlib.Z_SYNC_FLUSH
+            )
+            self.rendered[key] = rendered
+            return rendered
+
+
+class _Stream:
+    """
+    A compressed stream in the gzip or zlib format. Text is collected until
+    it is compressed, and compressed output until it is taken.
+    """
+
+    def __init__(self, level, format):
+        if format == "gzip":
+            header, self.checksum, self.value = _GZIP_HEADER, zlib.crc32, 0
+        elif format == "deflate":
+            header, self.checksum, self.value = _ZLIB_HEADER, zlib.adler32, 1
+        else:
+            raise ValueError(f"Unknown format {format!r}, use 'gzip' or 'deflate'")
+        self.format = format
+        self.compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+        self.size = 0
+        self.text = []
+        self.text_size = 0
+        self.output = [header]
+        self.output_size = len(header)
+
+    def _add(self, data):
+        self.output.append(data)
+        self.output_size += len(data)
+
+    def _data(self, data):
+        self.value = self.checksum(data, self.value)
+        self.size += len(data)
+
+    def write(self, fragment):
+        self.text.append(fragment)
+        self.text_size += len(fragment)
+
+    def compress(self, mode=None):
+        if self.text:
+            data = "".join(self.text).encode()
+            self.text.clear()
+            self.text_size = 0
+            self._data(data)
+            self._add(self.compressor.compress(data))
+        if mode is not None:
+            self._add(self.compressor.flush(mode))
+
+    def splice(self, fragment):
+        self.compress(zlib.Z_FULL_FLUSH)
+        self._data(fragment.data)
+        self._add(fragment.compressed)
+
+    def finish(self):
+        self.compress(zlib.Z_FINISH)
+        if self.format == "gzip":
+            self._add(struct.pack("<II", self.value, self.size & 0xFFFFFFFF))
+        else:
+            self._add(struct.pack(">I", self.value))
+
+    def take(self):
+        output = b"".join(self.output)
+        self.output.clear()
+        self.output_size = 0
+        return output
+
+
+def render_compressed(
+    node,
+    context=None,
+    indent=0,
+    level=6,
+    format="gzip",
+    flush_after=("</head>",),
+    chunk_size=16384,
+    buffer_size=4096,
+    minify=False,
+):
+    """
+    Render the node as UTF-8, compressed as it is rendered, and yield the
+    compressed output in chunks of about `chunk_size` bytes. `format` is
+    "gzip" or "deflate" (the zlib format, as used by the HTTP "deflate"
+    content coding), and `level` is the zlib compression level.
+
+    Rendered text is compressed in batches of about `buffer_size`
+    characters. After a fragment ending with one of `flush_after`, the
+    compressor is flushed and everything so far is yielded, so that the
+    browser can start on the head of the page (and fetch its assets) while
+    the rest is rendered. The output of `precompressed` nodes is spliced
+    into the stream as it is, after a full flush so that the compressor
+    doesn't refer back past it.
+    """
+    stream = _Stream(level, format)
+    for fragment in render_iter(node, context, indent, minify=minify):
+        if type(fragment) is _Precompressed:
+            stream.splice(fragment)
+        else:
+            stream.write(fragment)
+            if fragment.endswith(flush_after):
+                stream.compress(zlib.Z_SYNC_FLUSH)
+                yield stream.take()
+                continue
+            if stream.text_size >= buffer_size:
+                stream.compress()
+        if stream.output_size >= chunk_size:
+            yield stream.take()
+    stream.finish()
+    yield stream.take()
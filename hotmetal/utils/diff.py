@@ -0,0 +1,177 @@
+from hotmetal import render, static
+from hotmetal.utils.find import iter_children
+
+REPLACE, SET_ATTR, REMOVE_ATTR, INSERT, REMOVE = (
+    "replace",
+    "set_attr",
+    "remove_attr",
+    "insert",
+    "remove",
+)
+
+
+def _flatten(node, context):
+    """
+    Return the children of the node as the browser would see them:
+    fragments are replaced by their children, context callables by the nodes
+    they return, and empty nodes are dropped. Static nodes are kept as they are, because
+    there's no way to know how many elements they render.
+    """
+    flat = []
+    stack = [iter_children(node)]
+    while stack:
+        for child in stack[-1]:
+            if callable(child):
+                child = child(context)
+            if not child:
+                continue
+            if isinstance(child, (str, static)) or child[0]:
+                flat.append(child)
+                continue
+            stack.append(iter_children(child))
+            break
+        else:
+            stack.pop()
+    return flat
+
+
+def _texts(flat):
+    """
+    Return the text children, each with the number of elements before it.
+    """
+    texts = []
+    elements = 0
+    for child in flat:
+        if isinstance(child, str):
+            texts.append((elements, child))
+        else:
+            elements += 1
+    return texts
+
+
+def _keys(elements):
+    keys = [element[1].get("key") for element in elements]
+    if None in keys or len(set(keys)) != len(keys):
+        return None
+    return keys
+
+
+class _Differ:
+    def __init__(self, context, indent):
+        self.context = context
+        self.indent = indent
+        self.patches = []
+
+    def render(self, node):
+        return render(node, self.context, self.indent)
+
+    def element(self, old, new, path):
+        if old is new:
+            return
+        old_tag, old_attrs, old_children = old
+        new_tag, new_attrs, new_children = new
+        if old_tag != new_tag:
+            self.patches.append((REPLACE, path, self.render(new)))
+            return
+        if old_attrs is not new_attrs:
+            for key, value in new_attrs.items():
+                if key not in old_attrs or old_attrs[key] != value:
+                    self.patches.append((SET_ATTR, path, key, value))
+            for key in old_attrs:
+                if key not in new_attrs:
+                    self.patches.append((REMOVE_ATTR, path, key))
+        if old_children is not new_children:
+            self.children(old, new, path)
+
+    def children(self, old, new, path):
+        old_flat = _flatten(old, self.context)
+        new_flat = _flatten(new, self.context)
+        if any(isinstance(child, static) for child in old_flat + new_flat):
+            # There's no way to know how many elements a static node renders,
+            # so if anything has changed, the whole element is replaced.
+            if self.render(("", {}, old_flat)) != self.render(("", {}, new_flat)):
+                self.patches.append((REPLACE, path, self.render(new)))
+            return
+        if _texts(old_flat) != _texts(new_flat):
+            self.patches.append((REPLACE, path, self.render(new)))
+            return
+        old_elements = [child for child in old_flat if not isinstance(child, str)]
+        new_elements = [child for child in new_flat if not isinstance(child, str)]
+        old_keys = _keys(old_elements)
+        new_keys = _keys(new_elements)
+        if old_keys is None or new_keys is None:
+            self.positional(old_elements, new_elements, path)
+        elif not self.keyed(old_elements, new_elements, old_keys, new_keys, path):
+            self.patches.append((REPLACE, path, self.render(new)))
+
+    def positional(self, old_elements, new_elements, path):
+        for index, (old, new) in enumerate(zip(old_elements, new_elements)):
+            self.element(old, new, (*path, index))
+        for index in reversed(range(len(new_elements), len(old_elements))):
+            self.patches.append((REMOVE, path, index))
+        for index in range(len(old_elements), len(new_elements)):
+            self.patches.append((INSERT, path, index, self.render(new_elements[index])))
+
+    def keyed(self, old_elements, new_elements, old_keys, new_keys, path):
+        """
+        Diff children matched by their "key" attributes. Moving children
+        isn't supported, so if the children that are kept have changed order,
+        return False to have the parent replaced instead.
+        """
+        new_key_set = set(new_keys)
+        kept = [key for key in old_keys if key in new_key_set]
+        old_by_key = dict(zip(old_keys, old_elements))
+        if [key for key in new_keys if key in old_by_key] != kept:
+            return False
+        for index in reversed(range(len(old_keys))):
+            if old_keys[index] not in new_key_set:
+                self.patches.append((REMOVE, path, index))
+        for index, (key, new) in enumerate(zip(new_keys, new_elements)):
+            old = old_by_key.get(key)
+            if old is None:
+                self.patches.append((INSERT, path, index, self.render(new)))
+            else:
+                self.element(old, new, (*path, index))
+        return True
+
+
+def diff(old, new, context=None, indent=0):
+    """
+    Compare two trees and return a list of patches that turn the HTML of
+    the old tree into the HTML of the new one. Each patch is a tuple whose
+    first two items are the operation and the path of the element it
+    applies to, as a tuple of indices into each element's element children
+    (text is not counted, and fragments are replaced by their children):
+
+    - `(REPLACE, path, html)` replaces the element
+    - `(SET_ATTR, path, key, value)` sets an attribute
+    - `(REMOVE_ATTR, path, key)` removes an attribute
+    - `(INSERT, path, index, html)` inserts a child element at `index`
+    - `(REMOVE, path, index)` removes the child element at `index`
+
+    Patches must be applied in order. Subtrees that are the same object in
+    both trees are skipped without being compared. If every element child
+    of an element has a "key" attribute, children are matched by key rather
+    than by position. Elements whose text children have changed, or whose
+    keyed children have changed order, are replaced as a whole. Context
+    callables in both trees are called with `context`.
+    """
+    context = context or {}
+    differ = _Differ(context, indent)
+    if callable(old):
+        old = old(context)
+    if callable(new):
+        new = new(context)
+    if (
+        not old
+        or not new
+        or isinstance(old, (str, static))
+        or isinstance(new, (str, static))
+        or not old[0]
+        or not new[0]
+    ):
+        if old is not new:
+            differ.patches.append((REPLACE, (), differ.render(new)))
+    else:
+        differ.element(old, new, ())
+    return differ.patches
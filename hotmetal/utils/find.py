@@ -1,6 +1,17 @@
+from hotmetal import static
+
 TAG, ATTRS, CHILDREN = 0, 1, 2
 
 
+def _indexed(predicate, *index_key):
+    """
+    Label a predicate with a description that `TreeIndex` can use to answer
+    it from its maps, rather than by testing every node.
+    """
+    predicate.index_key = index_key
+    return predicate
+
+
 def is_text_node(node):
     return isinstance(node, str)
 
@@ -9,12 +20,57 @@ def is_context_node(node):
     return callable(node)
 
 
+def is_static_node(node):
+    return isinstance(node, static)
+
+
 def is_tree_node(node):
-    return not_(or_(is_text_node, is_context_node))(node)
+    # Static nodes are leaves: their trees (if they have one) are only
+    # rendered, never walked.
+    return not (is_text_node(node) or is_context_node(node) or is_static_node(node))
+
+
+def iter_children(node):
+    """
+    Return an iterator over the children of a tree node. One-shot iterables
+    (generators, database cursors, `itertools` chains) can only be walked
+    once, by `render`, so they raise a TypeError here rather than silently
+    being used up. Use `materialize` to turn them into lists first.
+    """
+    children = node[CHILDREN]
+    iterator = iter(children)
+    if iterator is children:
+        raise TypeError(
+            f"The children of {node[TAG]!r} are a one-shot iterator "
+            f"({type(children).__name__}), which can only be walked once. "
+            "Use hotmetal.utils.find.materialize on the tree first."
+        )
+    return iterator
+
+
+def materialize(node):
+    """
+    Return a copy of the tree in which the children of every tree node are
+    a list, so that one-shot iterables of children can be walked more than
+    once. Text, context callables and static nodes are shared with the
+    original tree.
+    """
+    root = [node]
+    stack = [(root, 0)]
+    while stack:
+        target, index = stack.pop()
+        node = target[index]
+        if not node or not is_tree_node(node):
+            continue
+        tag, attrs, children = node
+        children = list(children)
+        target[index] = (tag, attrs, children)
+        stack.extend((children, index) for index in range(len(children)))
+    return root[0]
 
 
 def tag_is(tag):
-    return and_(is_tree_node, lambda node: node[TAG] == tag)
+    return _indexed(and_(is_tree_node, lambda node: node[TAG] == tag), "tag", tag)
 
 
 def id_is(id):
@@ -22,19 +78,33 @@ def id_is(id):
 
 
 def attr_value_matches(attr, predicate):
-    return and_(has_attr(attr), lambda node: predicate(node[ATTRS][attr]))
+    return _indexed(
+        and_(has_attr(attr), lambda node: predicate(node[ATTRS][attr])),
+        "attr_value_matches",
+        attr,
+        predicate,
+    )
 
 
 def has_class(cls):
-    return attr_value_matches("class", lambda attr_value: cls in attr_value.split(" "))
+    return _indexed(
+        attr_value_matches("class", lambda attr_value: cls in attr_value.split(" ")),
+        "class",
+        cls,
+    )
 
 
 def has_attr(attr):
-    return and_(is_tree_node, lambda node: attr in node[ATTRS])
+    return _indexed(and_(is_tree_node, lambda node: attr in node[ATTRS]), "attr", attr)
 
 
 def has_attr_with_value(attr, value):
-    return attr_value_matches(attr, lambda attr_value: attr_value == value)
+    return _indexed(
+        attr_value_matches(attr, lambda attr_value: attr_value == value),
+        "attr_value",
+        attr,
+        value,
+    )
 
 
 def text_contains(text):
@@ -42,15 +112,23 @@ def text_contains(text):
 
 
 def any_immediate_child_matches(predicate):
-    return lambda node: any(predicate(child) for child in node[CHILDREN])
+    return lambda node: any(predicate(child) for child in iter_children(node))
 
 
 def or_(*predicates):
-    return lambda node: any(predicate(node) for predicate in predicates)
+    return _indexed(
+        lambda node: any(predicate(node) for predicate in predicates),
+        "or",
+        predicates,
+    )
 
 
 def and_(*predicates):
-    return lambda node: all(predicate(node) for predicate in predicates)
+    return _indexed(
+        lambda node: all(predicate(node) for predicate in predicates),
+        "and",
+        predicates,
+    )
 
 
 def not_(predicate):
@@ -58,6 +136,112 @@ def not_(predicate):
 
 
 def find(nodes, predicate):
-    for node in nodes:
-        yield from [node] if predicate(node) else []
-        yield from find(node[CHILDREN], predicate) if is_tree_node(node) else []
+    stack = [iter(nodes)]
+    while stack:
+        for node in stack[-1]:
+            if predicate(node):
+                yield node
+            if is_tree_node(node):
+                stack.append(iter_children(node))
+                break
+        else:
+            stack.pop()
+
+
+class TreeIndex:
+    """
+    Walks a tree once and builds maps from tag names, IDs, class names and
+    attribute names to the nodes that have them, so that queries made with
+    `tag_is`, `id_is`, `has_class`, `has_attr`, `has_attr_with_value` and
+    `attr_value_matches` (and combinations of them with `and_` and `or_`)
+    don't need to look at every node in the tree. Other predicates are
+    tested against every node, as with `find`.
+
+    The maps hold the positions of the nodes in depth-first pre-order, so
+    `index.find(predicate)` returns the same nodes in the same order as
+    `find(nodes, predicate)`. The index is not updated if the tree changes.
+    """
+
+    def __init__(self, nodes):
+        self.nodes = []
+        self.tags = {}
+        self.ids = {}
+        self.classes = {}
+        self.attrs = {}
+        stack = [iter(nodes)]
+        while stack:
+            for node in stack[-1]:
+                position = len(self.nodes)
+                self.nodes.append(node)
+                if is_tree_node(node):
+                    self._add(node, position)
+                    stack.append(iter_children(node))
+                    break
+            else:
+                stack.pop()
+
+    def _add(self, node, position):
+        self.tags.setdefault(node[TAG], []).append(position)
+        for attr, value in node[ATTRS].items():
+            self.attrs.setdefault(attr, []).append(position)
+            if attr == "id":
+                self.ids.setdefault(value, []).append(position)
+            elif attr == "class" and isinstance(value, str):
+                for cls in set(value.split(" ")):
+                    self.classes.setdefault(cls, []).append(position)
+
+    def _positions(self, predicate):
+        """
+        Return the positions of the nodes that match the predicate, or None
+        if the predicate can't be answered from the maps.
+        """
+        index_key = getattr(predicate, "index_key", None)
+        if index_key is None:
+            return None
+        kind, *args = index_key
+        if kind == "tag":
+            return self.tags.get(args[0], [])
+        if kind == "class":
+            return self.classes.get(args[0], [])
+        if kind == "attr":
+            return self.attrs.get(args[0], [])
+        if kind == "attr_value":
+            attr, value = args
+            if attr == "id":
+                return self.ids.get(value, [])
+            return self._filter(self.attrs.get(attr, []), predicate)
+        if kind == "attr_value_matches":
+            return self._filter(self.attrs.get(args[0], []), predicate)
+        if kind == "or":
+            positions = [self._positions(p) for p in args[0]]
+            if None in positions:
+                return None
+            return sorted(set().union(*positions))
+        if kind == "and":
+            indexed, others = [], []
+            for p in args[0]:
+                positions = self._positions(p)
+                if positions is None:
+                    others.append(p)
+                else:
+                    indexed.append(positions)
+            if not indexed:
+                return None
+            indexed.sort(key=len)
+            positions = set(indexed[0]).intersection(*indexed[1:])
+            return self._filter(sorted(positions), *others)
+        return None
+
+    def _filter(self, positions, *predicates):
+        nodes = self.nodes
+        return [
+            position
+            for position in positions
+            if all(predicate(nodes[position]) for predicate in predicates)
+        ]
+
+    def find(self, predicate):
+        positions = self._positions(predicate)
+        if positions is None:
+            return [node for node in self.nodes if predicate(node)]
+        return [self.nodes[position] for position in positions]
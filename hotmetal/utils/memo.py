@@ -0,0 +1,153 @@
+from functools import update_wrapper
+from hotmetal import _render_iter, safe, static
+from time import monotonic
+
+import sys
+
+
+class _MemoNode(static):
+    """
+    Stands in for a call to a memoized component. The component is only
+    called, and its tree rendered, if the output isn't already cached for
+    the indentation setting, nesting level and context it appears at.
+    """
+
+    def __init__(self, memo, key, args, kwargs):
+        self.memo = memo
+        self.key = key
+        self.args = args
+        self.kwargs = kwargs
+
+    def _render(self, context, indent, level):
+        return self.memo._render(self, context, indent, level)
+
+    def _tree(self, context):
+        return self.memo.fn(*self.args, **self.kwargs)
+
+
+class Memo:
+    """
+    A component whose rendered output is cached, keyed by its arguments, the
+    indentation setting and nesting level it is rendered at, and the values
+    of the context keys in `depends_on`. Created with the `memo` decorator.
+
+    The cache is a bounded least-recently-used cache. If `ttl` is given,
+    entries older than `ttl` seconds are rendered again. Calls with
+    arguments (or context values) that can't be hashed are never cached.
+
+    A memoized component can be rendered in any number of threads at once.
+    Lookups don't take a lock, and two threads that miss the same entry at
+    the same time both render it. The counters may lose a few updates.
+    """
+
+    def __init__(self, fn, maxsize=128, ttl=None, depends_on=(), clock=monotonic):
+        update_wrapper(self, fn)
+        self.fn = fn
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.depends_on = tuple(depends_on)
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.memory = 0
+        self._entries = {}
+
+    def __call__(self, *args, **kwargs):
+        key = (args, tuple(sorted(kwargs.items())))
+        try:
+            hash(key)
+        except TypeError:
+            return self.fn(*args, **kwargs)
+        return _MemoNode(self, key, args, kwargs)
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+            "entries": len(self._entries),
+            "memory": self.memory,
+        }
+
+    def invalidate(self, *args, **kwargs):
+        """
+        Remove the cached output for these arguments, at every indentation
+        setting, nesting level and context.
+        """
+        key = (args, tuple(sorted(kwargs.items())))
+        # Copying the keys is a single operation, so it can't be interrupted
+        # by another thread adding an entry, as looping over them could.
+        for entry_key in [k for k in tuple(self._entries) if k[0] == key]:
+            self._remove(entry_key)
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = self.misses = self.memory = 0
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.memory -= sys.getsizeof(entry[1])
+
+    def _render(self, node, context, indent, level):
+        key = (
+            node.key,
+            indent,
+            level,
+            tuple(context.get(name) for name in self.depends_on),
+        )
+        try:
+            entry = self._entries.pop(key, None)
+        except TypeError:
+            self.misses += 1
+            return self._render_node(node, context, indent, level)
+        now = self.clock()
+        if entry is not None and (self.ttl is None or now < entry[0]):
+            self.hits += 1
+            self._entries[key] = entry
+            return entry[1]
+        if entry is not None:
+            self.memory -= sys.getsizeof(entry[1])
+        self.misses += 1
+        rendered = self._render_node(node, context, indent, level)
+        if len(self._entries) >= self.maxsize:
+            try:
+                self._remove(next(iter(self._entries)))
+            except (RuntimeError, StopIteration):
+                # Another thread changed the entries at the same time.
+                pass
+        expires = None if self.ttl is None else now + self.ttl
+        self._entries[key] = (expires, rendered)
+        self.memory += sys.getsizeof(rendered)
+        return rendered
+
+    def _render_node(self, node, context, indent, level):
+        tree = self.fn(*node.args, **node.kwargs)
+        return safe("".join(_render_iter(tree, context, indent, level)))
+
+
+def memo(maxsize=128, ttl=None, depends_on=(), clock=monotonic):
+    """
+    Decorate a component so that its rendered output is cached, keyed by
+    its arguments. Calling the decorated component returns a node that can
+    be used anywhere in a tree. The component is only called when the
+    output isn't already in the cache.
+
+    The component must be a pure function of its arguments. If its tree
+    contains context callables, list the context keys that they read in
+    `depends_on`, so that output is cached separately for each of their
+    values.
+    """
+
+    def decorator(fn):
+        return Memo(fn, maxsize, ttl, depends_on, clock)
+
+    return decorator
@@ -0,0 +1,113 @@
+from concurrent.futures import ProcessPoolExecutor
+from hotmetal import _render_iter, render, static
+
+import os
+import pickle
+
+
+def _split(node, context, depth, level, jobs):
+    """
+    Copy the top `depth` levels of the tree, calling any context callables
+    on the way, and replace each subtree below that with a `static` node to
+    be rendered separately. The `static` nodes and their nesting levels are
+    added to `jobs`.
+    """
+    if callable(node):
+        node = node(context)
+    if not node or isinstance(node, (str, static)):
+        return node
+    if depth == 0:
+        placeholder = static(node)
+        jobs.append((placeholder, level))
+        return placeholder
+    tag, attrs, children = node
+    level = level + 1 if tag else level
+    return (
+        tag,
+        attrs,
+        [_split(child, context, depth - 1, level, jobs) for child in children],
+    )
+
+
+def _render_chunk(payload):
+    nodes, context, indent = pickle.loads(payload)
+    return [
+        "".join(_render_iter(node, context, indent, level)) for node, level in nodes
+    ]
+
+
+def render_parallel(
+    node,
+    context=None,
+    indent=0,
+    workers=None,
+    depth=1,
+    chunksize=None,
+    executor=None,
+    fallback=True,
+):
+    """
+    Render the node like `render`, but render the subtrees `depth` levels
+    below the root in a pool of worker processes.
+
+    Each worker gets its own copy of the context, so context callables below
+    the split depth can read it but changes they make to it are not seen by
+    the rest of the page. Subtrees are sent to the workers in chunks of
+    `chunksize` (by default, enough for four chunks per worker). If a chunk
+    can't be pickled (because it contains a lambda, for example) it is
+    rendered in this process instead, or if `fallback` is False a TypeError is
+    raised. Pass an existing `concurrent.futures` executor to avoid starting a
+    new pool for every render.
+    """
+    context = context or {}
+    jobs = []
+    skeleton = _split(node, context, depth, 0, jobs)
+    if not jobs:
+        return render(skeleton, context, indent)
+
+    if executor is None:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return _render_jobs(
+                skeleton, jobs, context, indent, workers, chunksize, executor, fallback
+            )
+    return _render_jobs(
+        skeleton, jobs, context, indent, workers, chunksize, executor, fallback
+    )
+
+
+def _render_jobs(
+    skeleton, jobs, context, indent, workers, chunksize, executor, fallback
+):
+    """
+    Render the `static` nodes in `jobs` in the executor, then render the
+    skeleton of the tree around them.
+    """
+    if chunksize is None:
+        chunksize = -(-len(jobs) // (4 * (workers or os.cpu_count() or 1)))
+    chunks = [
+        jobs[start : start + chunksize] for start in range(0, len(jobs), chunksize)
+    ]
+    futures = []
+    for chunk in chunks:
+        nodes = [(placeholder.node, level) for placeholder, level in chunk]
+        try:
+            payload = pickle.dumps((nodes, context, indent))
+        except (pickle.PicklingError, AttributeError, TypeError) as e:
+            if not fallback:
+                raise TypeError(
+                    f"Can't send part of the tree to a worker process: {e}. "
+                    "Use module-level functions instead of lambdas for context "
+                    "callables, or pass fallback=True to render it in this process."
+                ) from e
+            futures.append(None)
+        else:
+            futures.append(executor.submit(_render_chunk, payload))
+
+    for chunk, future in zip(chunks, futures):
+        if future is not None:
+            for (placeholder, level), rendered in zip(chunk, future.result()):
+                placeholder.rendered[(indent, level)] = rendered
+
+    # Placeholders without a result (because they couldn't be sent to a worker)
+    # are rendered here, like any other static node.
+    return render(skeleton, context, indent)
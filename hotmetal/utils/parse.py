@@ -0,0 +1,117 @@
+from hotmetal import safe, VOID_ELEMENTS
+from html.parser import HTMLParser
+
+# The contents of these elements aren't escaped in HTML, so they are kept as
+# `safe` strings, to be rendered exactly as they were.
+RAW_TEXT_ELEMENTS = {"script", "style"}
+
+
+class _TreeBuilder(HTMLParser):
+    """
+    Builds tree nodes from HTML. Each frame on the stack holds an open
+    element, the list its children are added to (or None if its children
+    aren't being kept), and whether it matched the predicate.
+
+    Without a predicate, every element is kept, under a root fragment. With a
+    predicate, elements are tested when they are opened, and only the
+    subtrees of matching elements are kept. Matching elements are added to
+    `completed` when they are closed.
+    """
+
+    def __init__(self, predicate=None):
+        super().__init__(convert_charrefs=True)
+        self.predicate = predicate
+        self.root = ("", {}, [])
+        self.stack = [(self.root, None if predicate else self.root[2], False)]
+        self.completed = []
+
+    def handle_starttag(self, tag, attrs):
+        attributes = {}
+        for key, value in attrs:
+            # Like browsers, use the first of any repeated attributes.
+            attributes.setdefault(key, "" if value is None else value)
+        node = (tag, attributes, [])
+        siblings = self.stack[-1][1]
+        matched = False
+        if siblings is not None:
+            siblings.append(node)
+        else:
+            matched = self.predicate(node)
+        children = node[2] if siblings is not None or matched else None
+        if tag in VOID_ELEMENTS:
+            if matched:
+                self.completed.append(node)
+            return
+        self.stack.append((node, children, matched))
+
+    def handle_endtag(self, tag):
+        for depth in range(len(self.stack) - 1, 0, -1):
+            if self.stack[depth][0][0] == tag:
+                self._close(depth)
+                return
+
+    def handle_data(self, data):
+        node, children, _ = self.stack[-1]
+        if children is None:
+            return
+        if node[0] in RAW_TEXT_ELEMENTS:
+            data = safe(data)
+        if children and type(children[-1]) is type(data):
+            children[-1] = type(data)(children[-1] + data)
+        else:
+            children.append(data)
+
+    def _close(self, depth):
+        """
+        Close the element at `depth`, and any unclosed elements inside it.
+        """
+        while len(self.stack) > depth:
+            node, _, matched = self.stack.pop()
+            if matched:
+                self.completed.append(node)
+
+    def close(self):
+        super().close()
+        self._close(1)
+
+
+def parse(html):
+    """
+    Parse HTML into a fragment node, `("", {}, children)`, holding the
+    top-level nodes of the document. Elements are `(tag, attrs, children)`
+    tuples with dicts of attributes and lists of children. Character
+    references are decoded, attributes without values get an empty string,
+    and the contents of `script` and `style` elements are kept as `safe`
+    strings, so rendering the result gives back equivalent HTML.
+
+    Void elements never have children, end tags close any elements left
+    open inside them, and end tags that don't match an open element are
+    ignored. Comments, doctypes and processing instructions are dropped.
+    """
+    builder = _TreeBuilder()
+    builder.feed(html)
+    builder.close()
+    return builder.root
+
+
+def iterparse(source, predicate):
+    """
+    Parse HTML incrementally and yield each element that matches the
+    predicate (for example, one from `hotmetal.utils.find`) as soon as its
+    end tag has been parsed. `source` is a string or an iterable of strings,
+    such as a file opened in text mode.
+
+    Only matching subtrees are kept in memory, so large documents can be
+    filtered without building the whole tree. To make this possible, the
+    predicate is called with each element before its children have been
+    parsed, so it can only depend on the tag and attributes. Elements inside
+    a matching element are not tested or yielded separately, and text nodes
+    are never yielded.
+    """
+    builder = _TreeBuilder(predicate)
+    for chunk in [source] if isinstance(source, str) else source:
+        builder.feed(chunk)
+        yield from builder.completed
+        builder.completed.clear()
+    builder.close()
+    yield from builder.completed
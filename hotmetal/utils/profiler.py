@@ -0,0 +1,86 @@
+from time import perf_counter
+
+import json
+
+
+class Stats:
+    def __init__(self, kind, name):
+        self.kind = kind
+        self.name = name
+        self.calls = 0
+        self.total_time = 0.0
+        self.self_time = 0.0
+        self.bytes = 0
+        self.max_depth = 0
+
+    def as_dict(self):
+        return {
+            "kind": self.kind,
+            "name": self.name,
+            "calls": self.calls,
+            "total_time": self.total_time,
+            "self_time": self.self_time,
+            "bytes": self.bytes,
+            "max_depth": self.max_depth,
+        }
+
+
+class Profiler:
+    """
+    Records how many times each context callable (by `__qualname__`) and each
+    tag was rendered, the total time spent rendering them (including their
+    children), the time spent on them excluding any profiled children, the
+    number of bytes of output they produced and the deepest level at which
+    they appeared.
+
+    Pass an instance to `render` or `render_iter` with `profiler=...`. When
+    streaming with `render_iter`, the times include any time the consumer
+    spends between fragments.
+    """
+
+    def __init__(self, clock=perf_counter):
+        self.clock = clock
+        self.stats = {}
+        self.bytes = 0
+        self._stack = []
+
+    def enter(self, kind, name, depth):
+        self._stack.append([kind, name, depth, self.clock(), self.bytes, 0.0])
+
+    def exit(self):
+        kind, name, depth, start, start_bytes, child_time = self._stack.pop()
+        elapsed = self.clock() - start
+        stats = self.stats.get((kind, name))
+        if stats is None:
+            stats = self.stats[(kind, name)] = Stats(kind, name)
+        stats.calls += 1
+        stats.total_time += elapsed
+        stats.self_time += elapsed - child_time
+        stats.bytes += self.bytes - start_bytes
+        stats.max_depth = max(stats.max_depth, depth)
+        if self._stack:
+            self._stack[-1][5] += elapsed
+
+    def rows(self, sort="total_time"):
+        return sorted(
+            (stats.as_dict() for stats in self.stats.values()),
+            key=lambda row: row[sort],
+            reverse=True,
+        )
+
+    def to_json(self, sort="total_time", **kwargs):
+        return json.dumps(self.rows(sort), **kwargs)
+
+    def table(self, sort="total_time"):
+        lines = [
+            f"{'kind':<10}{'name':<40}{'calls':>8}{'total ms':>11}"
+            f"{'self ms':>11}{'bytes':>11}{'depth':>7}"
+        ]
+        for row in self.rows(sort):
+            name = row["name"] if row["kind"] == "component" else f"<{row['name']}>"
+            lines.append(
+                f"{row['kind']:<10}{name:<40}{row['calls']:>8}"
+                f"{row['total_time'] * 1000:>11.3f}{row['self_time'] * 1000:>11.3f}"
+                f"{row['bytes']:>11}{row['max_depth']:>7}"
+            )
+        return "\n".join(lines)
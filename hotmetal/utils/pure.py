@@ -0,0 +1,213 @@
+from collections.abc import Mapping
+from functools import update_wrapper
+from hotmetal import static
+
+import threading
+
+# Recorded as the value of context keys that were looked up but missing.
+MISSING = object()
+
+
+class _ReadRecorder(Mapping):
+    """
+    Passed to a pure context callable in place of the context, to record
+    the keys it reads and the values it got for them (or MISSING). Anything
+    that reads every key, such as iterating over the context or taking its
+    length, sets `everything` instead.
+    """
+
+    def __init__(self, context):
+        self.context = context
+        self.reads = {}
+        self.everything = False
+
+    def __getitem__(self, key):
+        try:
+            value = self.context[key]
+        except KeyError:
+            self.reads[key] = MISSING
+            raise
+        self.reads[key] = value
+        return value
+
+    def __iter__(self):
+        self.everything = True
+        return iter(self.context)
+
+    def __len__(self):
+        self.everything = True
+        return len(self.context)
+
+
+def _check(node):
+    """
+    Return True if the node renders the same way in any context, so that it
+    can be rendered once and reused, False if it contains context callables
+    or subclasses of `static` (which can depend on the context, like
+    memoized components), or None if it contains one-shot iterables of
+    children, so that it can't be reused at all.
+    """
+    constant = True
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, str) or type(node) is static:
+            continue
+        if callable(node) or isinstance(node, static):
+            constant = False
+            continue
+        if not node:
+            continue
+        children = node[2]
+        if not isinstance(children, (list, tuple, str)):
+            return None
+        stack.extend(children)
+    return constant
+
+
+class Pure:
+    """
+    A context callable whose result only depends on the context keys it
+    reads, created with the `pure` decorator. Each time it is evaluated, the
+    keys it reads are recorded, and the result is kept until it is called
+    with a context where those keys have equal values, when the result is
+    returned without calling it again. So the callable is evaluated at most
+    once per render wherever it appears in the tree, and results are reused
+    across renders whose relevant context keys are equal. If the node it
+    returns contains no context callables, it is wrapped in `static`, so
+    that it is only rendered once for each indentation setting and nesting
+    level as well.
+
+    The cache is a bounded least-recently-used cache. Results of calls that
+    read context values that can't be hashed, or that read every key (for
+    example by iterating over the context), are never cached.
+
+    A pure callable can be used by renders in any number of threads at once.
+    Lookups don't take a lock; results are stored under one, after the
+    callable has been evaluated outside it. Two threads that miss the same
+    entry at the same time both evaluate it, and the counters may lose a
+    few updates.
+    """
+
+    def __init__(self, fn, maxsize=128):
+        update_wrapper(self, fn)
+        self.fn = fn
+        self.maxsize = maxsize
+        self.calls = 0
+        self.evaluations = 0
+        # Results keyed by (keys read, values of those keys). `_reads` holds
+        # each distinct tuple of keys read with a tuple of MISSING defaults
+        # to look them up with, and is replaced rather than changed, so that
+        # lookups can loop over it while another thread stores a result.
+        # `_counts` holds the number of entries for each tuple of keys.
+        self._entries = {}
+        self._reads = ()
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, context):
+        self.calls += 1
+        entries = self._entries
+        for keys, defaults in self._reads:
+            key = (keys, tuple(map(context.get, keys, defaults)))
+            try:
+                result = entries.pop(key, MISSING)
+            except TypeError:
+                continue
+            if result is not MISSING:
+                entries[key] = result
+                return result
+        self.evaluations += 1
+        recorder = _ReadRecorder(context)
+        result = self.fn(recorder)
+        if not recorder.everything:
+            keys = tuple(recorder.reads)
+            key = (keys, tuple(recorder.reads.values()))
+            try:
+                hash(key)
+            except TypeError:
+                return result
+            constant = _check(result)
+            if constant is None:
+                return result
+            if constant and result and not isinstance(result, (str, static)):
+                result = static(result)
+            with self._lock:
+                self._store(key, result)
+        return result
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def saved(self):
+        """
+        The number of evaluations saved by reusing earlier results.
+        """
+        return self.calls - self.evaluations
+
+    def stats(self):
+        return {
+            "calls": self.calls,
+            "evaluations": self.evaluations,
+            "saved": self.saved,
+            "entries": len(self._entries),
+        }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._reads = ()
+            self._counts.clear()
+            self.calls = self.evaluations = 0
+
+    def _store(self, key, result):
+        entries = self._entries
+        if len(entries) >= self.maxsize:
+            try:
+                self._remove(next(iter(entries)))
+            except (RuntimeError, StopIteration):
+                # A lookup in another thread changed the entries at the
+                # same time, so the cache can go over maxsize for a moment.
+                pass
+        keys = key[0]
+        if key not in entries:
+            if keys not in self._counts:
+                self._counts[keys] = 0
+                self._reads = (*self._reads, (keys, (MISSING,) * len(keys)))
+            self._counts[keys] += 1
+        entries[key] = result
+
+    def _remove(self, key):
+        if self._entries.pop(key, MISSING) is MISSING:
+            return
+        keys = key[0]
+        # A lookup that was interrupted by `clear` can put back an entry
+        # whose keys have no count, or whose count started again from zero.
+        count = self._counts.get(keys, 0) - 1
+        if count > 0:
+            self._counts[keys] = count
+        else:
+            self._counts.pop(keys, None)
+            self._reads = tuple(read for read in self._reads if read[0] != keys)
+
+
+def pure(maxsize=128):
+    """
+    Decorate a context callable whose result depends only on the context
+    keys it reads, so that it is evaluated at most once for each set of
+    values of those keys, however many times it appears in a tree and
+    across renders.
+
+    The callable must have no other inputs or side effects, and the node it
+    returns must not be changed afterwards, because the same node is
+    returned to every caller. It gets a read-only mapping in place of the
+    context; any context callables in the node it returns get the real one.
+    The decorated callable returns a `static` node in place of a tree with
+    no context callables in it.
+    """
+
+    def decorator(fn):
+        return Pure(fn, maxsize)
+
+    return decorator
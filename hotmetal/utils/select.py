@@ -0,0 +1,213 @@
+from functools import lru_cache
+from hotmetal.utils.find import ATTRS, is_tree_node, iter_children, TAG
+
+import re
+
+_TOKEN = re.compile(
+    r"""
+    \s*(?P<combinator>[>+~,])\s*
+    | (?P<space>\s+)
+    | (?P<tag>[-\w]+|\*)
+    | \#(?P<id>[-\w]+)
+    | \.(?P<cls>[-\w]+)
+    | \[\s*(?P<attr>[-\w:]+)\s*
+      (?:(?P<op>[~|^$*]?=)\s*
+         (?:"(?P<dq>[^"]*)"|'(?P<sq>[^']*)'|(?P<value>[-\w]+))\s*
+      )?\]
+    """,
+    re.VERBOSE,
+)
+# The valid start of an attribute selector, to find where an invalid one
+# goes wrong.
+_ATTR_PREFIX = re.compile(r"\[\s*(?:[-\w:]+\s*(?:[~|^$*]?=\s*)?)?")
+
+_ATTR_TESTS = {
+    None: lambda actual, value: True,
+    "=": lambda actual, value: actual == value,
+    "~=": lambda actual, value: value in actual.split(),
+    "|=": lambda actual, value: actual == value or actual.startswith(value + "-"),
+    "^=": lambda actual, value: bool(value) and actual.startswith(value),
+    "$=": lambda actual, value: bool(value) and actual.endswith(value),
+    "*=": lambda actual, value: bool(value) and value in actual,
+}
+
+
+def _compound(tag, id, classes, attrs):
+    """
+    Build a single function that matches a tree node against a compound
+    selector (such as `input#name.big[type=text]`), rather than a chain of
+    predicates.
+    """
+
+    def matches(node):
+        if tag is not None and node[TAG] != tag:
+            return False
+        node_attrs = node[ATTRS]
+        if id is not None and node_attrs.get("id") != id:
+            return False
+        if classes:
+            value = node_attrs.get("class")
+            if value is None:
+                return False
+            tokens = value.split(" ")
+            if any(cls not in tokens for cls in classes):
+                return False
+        for attr, test, value in attrs:
+            if attr not in node_attrs or not test(node_attrs[attr], value):
+                return False
+        return True
+
+    return matches
+
+
+def _steps(compounds, combinators):
+    """
+    Turn the compounds of a complex selector (left to right) and the
+    combinators between them into a list of (combinator, matcher) steps
+    ordered from right to left, as they are checked by `select`. Each step's
+    combinator says how its element relates to the element of the step
+    before it, so the first step's combinator is None.
+    """
+    return [(None, compounds[-1])] + [
+        (combinators[i], compounds[i]) for i in range(len(compounds) - 2, -1, -1)
+    ]
+
+
+@lru_cache(maxsize=256)
+def compile_selector(selector):
+    """
+    Compile a CSS selector group into a list of complex selectors, each of
+    which is a list of steps (see `_steps`). Compiled selectors are kept in
+    an LRU cache, so each selector string is only parsed once.
+    """
+    group = []
+    compounds = []
+    combinators = []
+    compound = None
+    position = 0
+
+    def error(position):
+        return ValueError(f"Invalid selector {selector!r} at position {position}")
+
+    text = selector.strip()
+    while position < len(text):
+        match = _TOKEN.match(text, position)
+        if not match:
+            prefix = _ATTR_PREFIX.match(text, position)
+            raise error(prefix.end() if prefix else position)
+        if match["combinator"] or match["space"]:
+            if compound is None:
+                raise error(position)
+            compounds.append(_compound(*compound))
+            compound = None
+            if match["combinator"] == ",":
+                group.append(_steps(compounds, combinators))
+                compounds, combinators = [], []
+            else:
+                combinators.append(match["combinator"] or " ")
+        else:
+            if compound is None:
+                compound = [None, None, [], []]
+            if match["tag"]:
+                if compound != [None, None, [], []]:
+                    raise error(position)
+                compound[0] = None if match["tag"] == "*" else match["tag"]
+            elif match["id"]:
+                compound[1] = match["id"]
+            elif match["cls"]:
+                compound[2].append(match["cls"])
+            else:
+                value = next(
+                    value
+                    for value in (match["dq"], match["sq"], match["value"], "")
+                    if value is not None
+                )
+                compound[3].append((match["attr"], _ATTR_TESTS[match["op"]], value))
+        position = match.end()
+    if compound is None:
+        raise error(position)
+    compounds.append(_compound(*compound))
+    group.append(_steps(compounds, combinators))
+    return group
+
+
+def _matches_from(steps, step, siblings, index, depth, path):
+    """
+    Check whether the steps from `step` onwards match, moving leftwards
+    through the selector from an element that has already matched the
+    previous step. The element is `siblings[index]`, and its ancestors are
+    `path[:depth]`.
+    """
+    if step == len(steps):
+        return True
+    combinator, matcher = steps[step]
+    if combinator == ">":
+        if depth == 0:
+            return False
+        parent, parent_siblings, parent_index = path[depth - 1]
+        return matcher(parent) and _matches_from(
+            steps, step + 1, parent_siblings, parent_index, depth - 1, path
+        )
+    if combinator == " ":
+        for ancestor_depth in range(depth - 1, -1, -1):
+            ancestor, ancestor_siblings, ancestor_index = path[ancestor_depth]
+            if matcher(ancestor) and _matches_from(
+                steps, step + 1, ancestor_siblings, ancestor_index, ancestor_depth, path
+            ):
+                return True
+        return False
+    if combinator == "+":
+        return (
+            index > 0
+            and matcher(siblings[index - 1])
+            and _matches_from(steps, step + 1, siblings, index - 1, depth, path)
+        )
+    # "~"
+    for sibling_index in range(index - 1, -1, -1):
+        if matcher(siblings[sibling_index]) and _matches_from(
+            steps, step + 1, siblings, sibling_index, depth, path
+        ):
+            return True
+    return False
+
+
+def select(nodes, selector):
+    """
+    Yield the tree nodes that match a CSS selector, in depth-first pre-order
+    like `find`. Supports type, universal, ID, class and attribute selectors,
+    the descendant, child (`>`), adjacent sibling (`+`) and general sibling
+    (`~`) combinators, and selector groups separated by commas.
+
+    The tree is walked once. For each element, the ancestors and preceding
+    siblings needed by the combinators are kept as the walk goes along, so
+    no subtree is scanned more than once. Fragments (nodes with an empty tag
+    name) are transparent, as they are when rendered: their children are
+    treated as children of the fragment's parent.
+    """
+    group = compile_selector(selector)
+    # path[depth] is the (element, siblings, index) of the current element at
+    # each depth, where the element is siblings[index].
+    path = []
+    stack = [(iter(nodes), [], 0)]
+    while stack:
+        children, siblings, depth = stack[-1]
+        for node in children:
+            if not node or not is_tree_node(node):
+                continue
+            if not node[TAG]:
+                stack.append((iter_children(node), siblings, depth))
+                break
+            index = len(siblings)
+            siblings.append(node)
+            del path[depth:]
+            path.append((node, siblings, index))
+            for steps in group:
+                if steps[0][1](node) and _matches_from(
+                    steps, 1, siblings, index, depth, path
+                ):
+                    yield node
+                    break
+            stack.append((iter_children(node), [], depth + 1))
+            break
+        else:
+            stack.pop()
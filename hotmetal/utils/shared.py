@@ -0,0 +1,203 @@
+from hashlib import blake2b
+from hotmetal import _render_iter, safe, static
+
+import fcntl
+import mmap
+import os
+import struct
+import threading
+
+# The file starts with a header, followed by one clock hand (a byte) for each
+# set of slots, followed by the slots. Each slot has a header of its own: a
+# sequence number, the digest of its key, the length of its value and a
+# "referenced" flag for clock eviction.
+_HEADER = struct.Struct("<4sIIII")
+_SLOT_HEADER = struct.Struct("<Q16sIB3x")
+_SEQUENCE = struct.Struct("<Q")
+_MAGIC = b"HMSC"
+_VERSION = 1
+_EMPTY = bytes(16)
+LOCK_STRIPES = 64
+
+
+class _SharedNode(static):
+    def __init__(self, cache, key, node):
+        self.cache = cache
+        self.key = key
+        self.node = node
+
+    def _render(self, context, indent, level):
+        key = f"{self.key}\0{indent}\0{level}"
+        rendered = self.cache.get(key)
+        if rendered is None:
+            rendered = "".join(_render_iter(self.node, context, indent, level))
+            self.cache.set(key, rendered)
+        return safe(rendered)
+
+
+class SharedCache:
+    """
+    A cache of rendered fragments in a memory-mapped file, which can be
+    shared by every process on a host that opens the same path.
+
+    The file is divided into `slots` fixed-size slots of `slot_size` bytes,
+    grouped into sets of `ways` slots. A key can only be stored in the set
+    chosen by its hash, and when the set is full, a slot is evicted using
+    the clock algorithm. Values that don't fit in a slot are not cached.
+
+    Reads don't take any locks. Each slot has a sequence number that writers
+    make odd while they change the slot and even again afterwards, and a
+    read is only accepted if the sequence number was the same even number
+    before and after it. Writers lock the set they are writing to with
+    `fcntl.lockf`, so writers in different processes only wait for each
+    other when they write to the same set. Because those locks are held by
+    the process, writers in different threads of a process also take one of
+    `LOCK_STRIPES` thread locks, chosen by the set. Those locks belong to
+    the instance, so threads should share one instance rather than opening
+    the file again.
+
+    A file created with different `slots`, `slot_size` or `ways` raises a
+    ValueError. The `hits` and `misses` counters only count lookups made by
+    this process.
+    """
+
+    def __init__(self, path, slots=4096, slot_size=16384, ways=8):
+        if slots % ways:
+            raise ValueError("slots must be a multiple of ways")
+        if slot_size <= _SLOT_HEADER.size:
+            raise ValueError(f"slot_size must be more than {_SLOT_HEADER.size}")
+        self.path = path
+        self.slots = slots
+        self.slot_size = slot_size
+        self.ways = ways
+        self.sets = slots // ways
+        self.capacity = slot_size - _SLOT_HEADER.size
+        self.hits = 0
+        self.misses = 0
+        self._hands = _HEADER.size
+        self._start = self._hands + -(-self.sets // 8) * 8
+        self._locks = [threading.Lock() for _ in range(min(self.sets, LOCK_STRIPES))]
+        size = self._start + slots * slot_size
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX)
+            try:
+                self._open(size)
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN)
+        except BaseException:
+            os.close(self._fd)
+            raise
+
+    def _open(self, size):
+        header = _HEADER.pack(_MAGIC, _VERSION, self.slots, self.slot_size, self.ways)
+        existing = os.fstat(self._fd).st_size
+        if existing == 0:
+            os.ftruncate(self._fd, size)
+            os.pwrite(self._fd, header, 0)
+        elif existing != size or os.pread(self._fd, _HEADER.size, 0) != header:
+            raise ValueError(
+                f"{self.path} is not a cache with slots={self.slots}, "
+                f"slot_size={self.slot_size} and ways={self.ways}"
+            )
+        self._mmap = mmap.mmap(self._fd, size)
+
+    def close(self):
+        self._mmap.close()
+        os.close(self._fd)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _locate(self, key):
+        digest = blake2b(key.encode(), digest_size=16).digest()
+        index = int.from_bytes(digest[:8], "little") % self.sets
+        return digest, index, self._start + index * self.ways * self.slot_size
+
+    def get(self, key):
+        """
+        Return the value stored for the key, or None.
+        """
+        digest, _, base = self._locate(key)
+        mm = self._mmap
+        for offset in range(base, base + self.ways * self.slot_size, self.slot_size):
+            sequence, slot_digest, length, _ = _SLOT_HEADER.unpack_from(mm, offset)
+            if sequence & 1 or slot_digest != digest:
+                continue
+            start = offset + _SLOT_HEADER.size
+            data = mm[start : start + min(length, self.capacity)]
+            if _SEQUENCE.unpack_from(mm, offset)[0] != sequence:
+                continue
+            # Setting the flag isn't protected by the sequence number, but
+            # the worst a race can do is make eviction slightly less fair.
+            mm[offset + _SLOT_HEADER.size - 4] = 1
+            self.hits += 1
+            return data.decode()
+        self.misses += 1
+        return None
+
+    def set(self, key, value):
+        """
+        Store the value for the key, and return whether it fitted in a slot.
+        """
+        data = value.encode()
+        if len(data) > self.capacity:
+            return False
+        digest, index, base = self._locate(key)
+        length = self.ways * self.slot_size
+        with self._locks[index % len(self._locks)]:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, length, base)
+            try:
+                offset = self._victim(digest, index, base)
+                mm = self._mmap
+                sequence = _SEQUENCE.unpack_from(mm, offset)[0] + 1
+                _SEQUENCE.pack_into(mm, offset, sequence)
+                start = offset + _SLOT_HEADER.size
+                mm[start : start + len(data)] = data
+                _SLOT_HEADER.pack_into(mm, offset, sequence, digest, len(data), 0)
+                _SEQUENCE.pack_into(mm, offset, sequence + 1)
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, length, base)
+        return True
+
+    def _victim(self, digest, index, base):
+        """
+        Return the offset of the slot to write the key to: the slot that
+        already holds it, an empty slot, or the slot chosen by the set's clock
+        hand, which clears the "referenced" flags it passes over. The flag is
+        set when an entry is read, so entries that have never been read are
+        evicted first.
+        """
+        mm = self._mmap
+        offsets = range(base, base + self.ways * self.slot_size, self.slot_size)
+        empty = None
+        for offset in offsets:
+            slot_digest = mm[offset + 8 : offset + 24]
+            if slot_digest == digest:
+                return offset
+            if empty is None and slot_digest == _EMPTY:
+                empty = offset
+        if empty is not None:
+            return empty
+        hand = mm[self._hands + index]
+        while True:
+            offset = offsets[hand % self.ways]
+            hand = (hand + 1) % self.ways
+            flag = offset + _SLOT_HEADER.size - 4
+            if mm[flag]:
+                mm[flag] = 0
+            else:
+                mm[self._hands + index] = hand
+                return offset
+
+    def node(self, key, node):
+        """
+        Return a node that renders like `node`, but is looked up in the cache
+        first, by the key and the indentation setting and nesting level it is
+        rendered at. Pass a context callable to avoid building the tree when
+        it's found in the cache.
+        """
+        return _SharedNode(self, key, node)
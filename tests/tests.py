@@ -1,7 +1,27 @@
-from hotmetal import render, safe, VOID_ELEMENTS
+from concurrent.futures import ThreadPoolExecutor
+from hotmetal import (
+    Element,
+    EMPTY_ATTRS,
+    h,
+    render,
+    render_into,
+    render_iter,
+    RenderLimitExceeded,
+    RenderLimits,
+    safe,
+    static,
+    StaticCache,
+    VOID_ELEMENTS,
+)
+from io import BytesIO, StringIO
 from textwrap import dedent
 from unittest import TestCase
 
+import hotmetal
+import pickle
+import sys
+import tracemalloc
+
 
 class EmptyNodeTestCase(TestCase):
     def test_empty_node(self):
@@ -145,3 +165,480 @@ class ContextTestCase(TestCase):
     def test_context(self):
         node = lambda context: ("div", {}, [context["message"]])  # noqa: E731
         self.assertEqual(render(node, context={"message": "test"}), "<div>test</div>")
+
+
+class RenderIterTestCase(TestCase):
+    nodes = [
+        "text",
+        "\ntext\n",
+        ("div", {"class": "test"}, [("div", {}, ["hello"])]),
+        ("", {}, [("div", {}, ["hello1"]), ("div", {}, ["hello2"])]),
+        ("p", {}, [("", {}, ["nested", ("", {}, [])]), ("br", {}, []), "text\n"]),
+        ("ul", {}, [("li", {}, "ab"), ("li", {}, [])]),
+        lambda context: ("div", {}, [context["message"]]),
+        lambda context: context["message"],
+    ]
+
+    def test_matches_render(self):
+        for node in self.nodes:
+            for indent in [0, 1, 2, 4]:
+                self.assertEqual(
+                    "".join(render_iter(node, {"message": "\nhi\n"}, indent)),
+                    render(node, {"message": "\nhi\n"}, indent),
+                )
+
+    def test_yields_fragments_in_document_order(self):
+        node = ("div", {"id": "x"}, ["hello", ("br", {}, [])])
+        self.assertEqual(
+            list(render_iter(node)), ['<div id="x">', "hello", "<br />", "</div>"]
+        )
+
+    def test_is_lazy(self):
+        def explode(context):
+            raise AssertionError("rendered too early")
+
+        fragments = render_iter(("div", {}, [explode]))
+        self.assertEqual(next(fragments), "<div>")
+
+
+class RenderIntoTestCase(TestCase):
+    def test_matches_render(self):
+        for node in RenderIterTestCase.nodes:
+            for indent in [0, 2]:
+                for buffer_size in [1, 10, 65536]:
+                    out = BytesIO()
+                    render_into(
+                        node,
+                        out,
+                        context={"message": "\nhé\n"},
+                        indent=indent,
+                        buffer_size=buffer_size,
+                    )
+                    self.assertEqual(
+                        out.getvalue(),
+                        render(node, {"message": "\nhé\n"}, indent).encode(),
+                    )
+
+    def test_encoding(self):
+        out = BytesIO()
+        render_into(("p", {}, ["hé"]), out, encoding="latin-1")
+        self.assertEqual(out.getvalue(), "<p>hé</p>".encode("latin-1"))
+
+    def test_text_target(self):
+        out = StringIO()
+        render_into(("p", {}, ["hé"]), out, encoding=None)
+        self.assertEqual(out.getvalue(), "<p>hé</p>")
+
+    def test_writes_are_buffered(self):
+        class Target:
+            def __init__(self):
+                self.writes = []
+
+            def write(self, data):
+                self.writes.append(data)
+
+        node = ("ul", {}, [("li", {}, [str(i)]) for i in range(100)])
+        target = Target()
+        render_into(node, target, buffer_size=100)
+        self.assertEqual(b"".join(target.writes), render(node).encode())
+        self.assertTrue(all(len(chunk) < 120 for chunk in target.writes))
+        self.assertLess(len(target.writes), 20)
+
+
+class ElementTestCase(TestCase):
+    def test_behaves_like_tuple(self):
+        element = h("a", {"href": "/"}, ["x"])
+        self.assertEqual(element, ("a", {"href": "/"}, ["x"]))
+        self.assertEqual(tuple(element), ("a", {"href": "/"}, ["x"]))
+        self.assertEqual(element[0], "a")
+        self.assertEqual(element[-1], ["x"])
+        self.assertEqual(len(element), 3)
+        tag, attrs, children = element
+        self.assertEqual((tag, attrs, children), ("a", {"href": "/"}, ["x"]))
+
+    def test_renders_like_tuple(self):
+        tuples = ("div", {"class": "x"}, [("", {}, [("br", {}, []), "hi"])])
+        elements = h("div", {"class": "x"}, [h("", None, [h("br"), "hi"])])
+        for indent in [0, 2]:
+            self.assertEqual(
+                render(elements, indent=indent), render(tuples, indent=indent)
+            )
+
+    def test_shares_empty_attrs(self):
+        self.assertIs(h("p").attrs, EMPTY_ATTRS)
+        self.assertIs(Element("p", {}).attrs, EMPTY_ATTRS)
+        with self.assertRaises(TypeError):
+            h("p").attrs["id"] = "x"
+        attrs = h("p").attrs
+        attrs |= {"id": "x"}
+        self.assertEqual(attrs, {"id": "x"})
+        self.assertEqual(EMPTY_ATTRS, {})
+        self.assertEqual(render(h("div")), "<div></div>")
+        self.assertIs(pickle.loads(pickle.dumps(EMPTY_ATTRS)), EMPTY_ATTRS)
+
+    def test_immutable_elements_are_cached(self):
+        cache = StaticCache()
+        node = h("p", None, (h("b", None, ("x",)),))
+        render(("div", {}, [node]), static_cache=cache)
+        render(("div", {}, [node]), static_cache=cache)
+        self.assertEqual(cache.hits, 1)
+
+
+class LazyChildrenTestCase(TestCase):
+    def rows(self, count):
+        return ("table", {}, (("tr", {}, [("td", {}, [str(i)])]) for i in range(count)))
+
+    def test_generator_children(self):
+        for indent in [0, 2]:
+            self.assertEqual(
+                render(self.rows(3), indent=indent),
+                render(("table", {}, [*self.rows(3)[2]]), indent=indent),
+            )
+
+    def test_streaming_uses_constant_memory(self):
+        peaks = []
+        for count in [10000, 100000]:
+            tracemalloc.start()
+            for _ in render_iter(self.rows(count)):
+                pass
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+        self.assertLess(peaks[1], peaks[0] * 1.5)
+
+
+class MinifyTestCase(TestCase):
+    def test_collapses_whitespace_outside_preformatted_elements(self):
+        node = (
+            "div",
+            {},
+            [
+                "  a \n\t b  ",
+                "\xa0\xa0",
+                safe("<i>  x  </i>"),
+                ("pre", {}, ["  a\n  ", ("b", {}, ["  b  "])]),
+                ("TEXTAREA", {}, ["  c  "]),
+                ("p", {}, ["\n\n"]),
+            ],
+        )
+        self.assertEqual(
+            render(node, minify=True, indent=2),
+            "<div> a b \xa0\xa0<i>  x  </i><pre>  a\n  <b>  b  </b></pre>"
+            "<TEXTAREA>  c  </TEXTAREA><p> </p></div>",
+        )
+
+    def test_attributes_and_void_elements(self):
+        node = (
+            "input",
+            {
+                "type": "text",
+                "value": "a b",
+                "title": "x=y",
+                "data-x": "a&b",
+                "required": "",
+                "class": "q'",
+            },
+            [],
+        )
+        self.assertEqual(
+            render(node, minify=True),
+            '<input type=text value="a b" title="x=y" data-x=a&amp;b required '
+            'class="q&#x27;">',
+        )
+
+    def test_optional_end_tags(self):
+        node = (
+            "",
+            {},
+            [
+                ("ul", {}, [("li", {}, ["a"]), ("li", {}, ["b"])]),
+                ("table", {}, [("tr", {}, [("td", {}, ["1"]), ("th", {}, ["2"])])]),
+                ("div", {}, [("p", {}, ["x"]), ("div", {}, []), ("p", {}, ["y"])]),
+                ("a", {}, [("p", {}, ["z"])]),
+                (
+                    "div",
+                    {},
+                    [("li", {}, ["c"]), "text", ("li", {}, ["d"]), ("b", {}, [])],
+                ),
+                ("p", {}, ["last"]),
+            ],
+        )
+        self.assertEqual(
+            render(node, minify=True),
+            render(node).replace(" />", ">"),
+        )
+        self.assertEqual(
+            render(node, minify=True, omit_optional_tags=True),
+            "<ul><li>a<li>b</ul><table><tr><td>1<th>2</th></table>"
+            "<div><p>x<div></div><p>y</div><a><p>z</p></a>"
+            "<div><li>c</li>text<li>d</li><b></b></div><p>last</p>",
+        )
+
+    def test_fragments_static_nodes_and_context(self):
+        node = (
+            "ul",
+            {},
+            [
+                ("", {}, [("li", {}, ["a  b"])]),
+                static(("", {}, [("li", {}, ["c  d"])])),
+                lambda context: ("li", {}, [context["x"]]),
+            ],
+        )
+        self.assertEqual(
+            render(node, {"x": "e  f"}, minify=True, omit_optional_tags=True),
+            "<ul><li>a b<li>c d<li>e f</ul>",
+        )
+
+    def test_static_subclasses(self):
+        class Tree(static):
+            def _render(self, context, indent, level):
+                return "unused"
+
+        class Opaque(static):
+            def __init__(self):
+                pass
+
+            def _render(self, context, indent, level):
+                return safe("<br />")
+
+        node = ("p", {}, [Tree(("br", {"class": "a b"}, [])), Opaque()])
+        self.assertEqual(render(node, minify=True), '<p><br class="a b"><br /></p>')
+
+    def test_render_iter_and_render_into(self):
+        node = ("p", {"id": "a"}, ["x  y"])
+        self.assertEqual("".join(render_iter(node, minify=True)), "<p id=a>x y</p>")
+        out = BytesIO()
+        render_into(node, out, minify=True)
+        self.assertEqual(out.getvalue(), b"<p id=a>x y</p>")
+
+    def test_profiler_cannot_be_used(self):
+        with self.assertRaises(ValueError):
+            render(("p", {}, []), minify=True, profiler=object())
+
+
+class RenderLimitsTestCase(TestCase):
+    def comments(self, context):
+        return ("div", {}, [("p", {}, ["reply"]), self.comments])
+
+    def test_output_is_unchanged_within_limits(self):
+        node = ("ul", {}, [("li", {}, [str(i)]) for i in range(10)])
+        limits = RenderLimits(max_nodes=100, max_depth=5, max_bytes=1000, deadline=60)
+        self.assertEqual(render(node, limits=limits), render(node))
+        self.assertEqual(render(node, indent=2, limits=limits), render(node, indent=2))
+
+    def test_max_nodes(self):
+        node = ("ul", {}, [("li", {}, [str(i)]) for i in range(10)])
+        render(node, limits=RenderLimits(max_nodes=21))
+        with self.assertRaises(RenderLimitExceeded) as cm:
+            render(node, limits=RenderLimits(max_nodes=20))
+        self.assertEqual(cm.exception.limit, "max_nodes")
+        self.assertEqual(cm.exception.value, 20)
+        self.assertEqual(cm.exception.path, ("ul", "li"))
+
+    def test_max_depth_with_runaway_component(self):
+        with self.assertRaises(RenderLimitExceeded) as cm:
+            render(self.comments, limits=RenderLimits(max_depth=7))
+        exception = cm.exception
+        self.assertEqual(exception.limit, "max_depth")
+        # The path ends with the component or tag that went too deep.
+        name = self.comments.__qualname__
+        self.assertEqual(exception.path, (name, "div") * 4)
+        self.assertTrue(
+            str(exception).startswith(f"max_depth=7 exceeded at {name} > div")
+        )
+
+    def test_fragments_are_not_in_path(self):
+        node = ("", {}, [("", {}, [("p", {}, ["x"])])])
+        with self.assertRaises(RenderLimitExceeded) as cm:
+            render(node, limits=RenderLimits(max_nodes=3))
+        self.assertEqual(cm.exception.path, ("p",))
+
+    def test_fragments_do_not_count_towards_depth(self):
+        node = ("", {}, [("", {}, [("p", {}, ["x"])])])
+        self.assertEqual(render(node, limits=RenderLimits(max_depth=1)), "<p>x</p>")
+        with self.assertRaises(RenderLimitExceeded) as cm:
+            render(("", {}, [node]), limits=RenderLimits(max_depth=0))
+        self.assertEqual(str(cm.exception), "max_depth=0 exceeded at p")
+
+    def test_max_bytes(self):
+        node = ("p", {}, ["x" * 100])
+        render(node, limits=RenderLimits(max_bytes=107))
+        with self.assertRaises(RenderLimitExceeded) as cm:
+            render(node, limits=RenderLimits(max_bytes=106))
+        self.assertEqual(cm.exception.limit, "max_bytes")
+
+    def test_max_bytes_stops_streaming(self):
+        node = ("ul", {}, [("li", {}, [str(i)]) for i in range(1000)])
+        out = BytesIO()
+        with self.assertRaises(RenderLimitExceeded):
+            render_into(node, out, limits=RenderLimits(max_bytes=100), buffer_size=10)
+        self.assertLessEqual(len(out.getvalue()), 100)
+
+    def test_deadline(self):
+        now = [0.0]
+
+        def clock():
+            now[0] += 1
+            return now[0]
+
+        def slow(context):
+            return ("li", {}, ["x"])
+
+        node = ("ul", {}, [slow for _ in range(100)])
+        limits = RenderLimits(deadline=5, check_every=10, clock=clock)
+        with self.assertRaises(RenderLimitExceeded) as cm:
+            render(node, limits=limits)
+        self.assertEqual(cm.exception.limit, "deadline")
+        # The clock is read at the start, then once every 10 nodes.
+        self.assertEqual(now[0], 7)
+
+    def test_limits_are_per_render(self):
+        node = ("p", {}, ["x"])
+        limits = RenderLimits(max_nodes=2)
+        for _ in range(3):
+            self.assertEqual(render(node, limits=limits), "<p>x</p>")
+
+    def test_minify_cannot_be_used(self):
+        with self.assertRaises(ValueError):
+            render(("p", {}, []), minify=True, limits=RenderLimits())
+
+
+class DeepTreeTestCase(TestCase):
+    def test_deep_tree_does_not_hit_recursion_limit(self):
+        depth = 20000
+        node = "leaf"
+        for _ in range(depth):
+            node = ("div", {}, [node])
+        self.assertEqual(render(node), "<div>" * depth + "leaf" + "</div>" * depth)
+
+    def test_deep_tree_with_indentation(self):
+        node = ("", {}, [("b", {}, [("i", {}, [("", {}, ["x"])])])])
+        self.assertEqual(
+            render(node, indent=1),
+            "<b>\n <i>  \n  x  \n </i>\n</b>",
+        )
+
+
+class StaticTestCase(TestCase):
+    def test_static_node_renders_like_wrapped_node(self):
+        node = ("nav", {}, [("a", {"href": "/"}, ["Home"])])
+        wrapped = ("div", {}, [static(node), static(node)])
+        unwrapped = ("div", {}, [node, node])
+        for indent in [0, 2]:
+            self.assertEqual(
+                render(wrapped, indent=indent), render(unwrapped, indent=indent)
+            )
+
+    def test_static_node_is_rendered_once_per_level(self):
+        calls = []
+        node = static(("p", {}, [lambda context: calls.append(1) or "hi"]))
+        render(("div", {}, [node, ("div", {}, [node, node])]), indent=2)
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(set(node.rendered), {(2, 1), (2, 2)})
+
+
+class StaticCacheTestCase(TestCase):
+    def test_immutable_subtrees_are_cached(self):
+        footer = ("footer", {}, (("p", {}, ("&copy; me",)),))
+        cache = StaticCache()
+        for message in ["one", "two"]:
+            node = ("body", {}, [("h1", {}, [message]), footer])
+            self.assertEqual(
+                render(node, static_cache=cache),
+                f"<body><h1>{message}</h1><footer><p>&amp;copy; me</p></footer></body>",
+            )
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_subtrees_with_callables_or_lists_are_not_cached(self):
+        cache = StaticCache()
+        node = ("div", {}, (("p", {}, [lambda context: context["x"]]),))
+        self.assertEqual(
+            render(node, {"x": "1"}, static_cache=cache), "<div><p>1</p></div>"
+        )
+        self.assertEqual(
+            render(node, {"x": "2"}, static_cache=cache), "<div><p>2</p></div>"
+        )
+
+    def test_cache_is_bounded(self):
+        cache = StaticCache(maxsize=2)
+        nodes = [("p", {}, (str(i),)) for i in range(5)]
+        for node in nodes:
+            render(node, static_cache=cache)
+        self.assertEqual(len(cache), 2)
+        render(nodes[-1], static_cache=cache)
+        self.assertEqual(cache.hits, 1)
+
+
+class ThreadSafetyTestCase(TestCase):
+    def setUp(self):
+        # Switch threads as often as possible, to make races more likely.
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        self.addCleanup(sys.setswitchinterval, interval)
+
+    def page(self, i):
+        def nested(context):
+            # Rendering from inside a render, as a component might.
+            return safe(render(("em", {}, [context["user"]])))
+
+        return (
+            "div",
+            {"id": f"page-{i}", "class": "page"},
+            [
+                ("h1", {}, [f"Title <{i % 50}>"]),
+                nested,
+                static(("nav", {}, [("a", {"href": "/"}, ["Home"])])),
+                ("ul", {}, (("li", {}, (f"item {i % 7} & {j}",)) for j in range(20))),
+                ("footer", {}, (("p", {}, (f"footer {i % 3}",)),)),
+            ],
+        )
+
+    def test_concurrent_renders_match_serial_renders(self):
+        cache = StaticCache(maxsize=8)
+        pages = range(2000)
+
+        def run(i):
+            context = {"user": f"user {i}"}
+            return render(self.page(i), context, indent=i % 2, static_cache=cache)
+
+        expected = [
+            render(self.page(i), {"user": f"user {i}"}, indent=i % 2) for i in pages
+        ]
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            self.assertEqual(list(executor.map(run, pages)), expected)
+        self.assertLessEqual(len(cache), 8 + 8)
+
+
+class EscapeCacheTestCase(TestCase):
+    def test_repeated_strings_are_escaped_consistently(self):
+        node = ("p", {"title": "a&b"}, ["a&b", "a&b", safe("a&b")])
+        for _ in range(2):
+            self.assertEqual(render(node), '<p title="a&amp;b">a&amp;ba&amp;ba&b</p>')
+
+    def test_cache_is_bounded(self):
+        for i in range(hotmetal.ESC_CACHE_SIZE + 10):
+            render(("p", {}, [f"<{i}>"]))
+        self.assertLessEqual(len(hotmetal._esc_cache), hotmetal.ESC_CACHE_SIZE)
+
+    def test_long_strings_are_not_cached(self):
+        text = "<" * (hotmetal.ESC_CACHE_MAX_LENGTH + 1)
+        render(text)
+        self.assertNotIn(text, hotmetal._esc_cache)
+
+
+class InternTableTestCase(TestCase):
+    def test_uppercase_void_elements(self):
+        self.assertEqual(render(("BR", {}, [])), "<BR />")
+        self.assertEqual(render(("Img", {"src": "a.png"}, [])), '<Img src="a.png" />')
+
+    def test_tables_are_bounded(self):
+        for i in range(hotmetal.INTERN_TABLE_SIZE + 10):
+            render((f"x-{i}", {f"data-{i}": "", f"aria-{i}": "1"}, []))
+        self.assertLessEqual(len(hotmetal._tags), hotmetal.INTERN_TABLE_SIZE)
+        self.assertLessEqual(len(hotmetal._attr_keys), hotmetal.INTERN_TABLE_SIZE)
+        self.assertEqual(render(("x-0", {"data-0": ""}, [])), "<x-0 data-0></x-0>")
+
+    def test_safe_names_are_not_confused_with_escaped_names(self):
+        self.assertEqual(render(("a<b", {}, [])), "<a&lt;b></a&lt;b>")
+        self.assertEqual(render((safe("a<b"), {}, [])), "<a<b></a<b>")
+        self.assertEqual(render(("p", {"x<": ""}, [])), "<p x&lt;></p>")
+        self.assertEqual(render(("p", {safe("x<"): ""}, [])), "<p x<></p>")
@@ -0,0 +1,79 @@
+from asyncio import run, sleep
+from hotmetal import render
+from hotmetal.utils.aio import render_async, render_iter_async
+from unittest import TestCase
+
+
+async def collect(fragments):
+    return [fragment async for fragment in fragments]
+
+
+def user_panel(delay):
+    async def panel(context):
+        await sleep(delay)
+        return ("p", {}, [f"Hello, {context['user']}", nested_panel])
+
+    return panel
+
+
+async def nested_panel(context):
+    await sleep(0)
+    return ("em", {}, ["!"])
+
+
+class RenderIterAsyncTestCase(TestCase):
+    def test_matches_render(self):
+        node = ("div", {"class": "test"}, [("div", {}, ["hello"])])
+        for indent in [0, 2]:
+            fragments = run(collect(render_iter_async(node, indent=indent)))
+            self.assertEqual("".join(fragments), render(node, indent=indent))
+
+    def test_awaitable_context_nodes(self):
+        node = ("div", {}, [user_panel(0)])
+        fragments = run(collect(render_iter_async(node, {"user": "bob"})))
+        self.assertEqual("".join(fragments), "<div><p>Hello, bob<em>!</em></p></div>")
+
+
+class RenderAsyncTestCase(TestCase):
+    def test_matches_render(self):
+        node = (
+            "",
+            {},
+            [("div", {}, [lambda context: context["user"], ("br", {}, [])]), ""],
+        )
+        for indent in [0, 2]:
+            self.assertEqual(
+                run(render_async(node, {"user": "bob"}, indent)),
+                render(node, {"user": "bob"}, indent),
+            )
+
+    def test_awaitables_are_rendered_in_document_order(self):
+        node = ("div", {}, [user_panel(0.02), "and", user_panel(0)])
+        self.assertEqual(
+            run(render_async(node, {"user": "bob"})),
+            "<div><p>Hello, bob<em>!</em></p>and<p>Hello, bob<em>!</em></p></div>",
+        )
+
+    def test_root_awaitable(self):
+        self.assertEqual(
+            run(render_async(user_panel(0), {"user": "bob"}, indent=2)),
+            "<p>\n  Hello, bob\n  <em>\n    !\n  </em>\n</p>",
+        )
+
+    def test_awaitables_run_concurrently_up_to_limit(self):
+        running = []
+        peak = []
+
+        async def tracked(context):
+            running.append(1)
+            peak.append(len(running))
+            await sleep(0.01)
+            running.pop()
+            return "x"
+
+        node = ("div", {}, [tracked] * 6)
+        self.assertEqual(run(render_async(node)), "<div>xxxxxx</div>")
+        self.assertEqual(max(peak), 6)
+        peak.clear()
+        self.assertEqual(run(render_async(node, concurrency=2)), "<div>xxxxxx</div>")
+        self.assertEqual(max(peak), 2)
@@ -1,4 +1,4 @@
-from hotmetal.utils.classnames import classnames
+from hotmetal.utils.classnames import classnames, classnames_many
 from unittest import TestCase
 
 
@@ -77,3 +77,37 @@ class ClassnamesTestCase(TestCase):
             classnames(["a", [[]]]),
             "a",
         )
+
+    def test_numbers_are_not_confused_with_booleans(self):
+        self.assertEqual(classnames(1), "1")
+        self.assertEqual(classnames(True), "")
+        self.assertEqual(classnames(1.0), "1.0")
+
+    def test_repeated_string_args(self):
+        for _ in range(2):
+            self.assertEqual(classnames(" a ", None, "b"), "a b")
+
+
+class CompiledClassnamesTestCase(TestCase):
+    def test_flags(self):
+        row = classnames.compile(
+            "row", {"active": ..., "fixed": True, "off": False, "odd": ...}, ["x"]
+        )
+        self.assertEqual(row(), "row fixed x")
+        self.assertEqual(row(active=True, odd=1), "row active fixed odd x")
+        self.assertEqual(row(odd=True), "row fixed odd x")
+        self.assertEqual(
+            row(active=1, odd=0),
+            classnames(
+                "row", {"active": 1, "fixed": True, "off": False, "odd": 0}, ["x"]
+            ),
+        )
+
+    def test_many(self):
+        row = classnames.compile("row", {"odd": ..., "selected": ...})
+        rows = [{"odd": i % 2, "selected": i % 3 == 0} for i in range(6)]
+        self.assertEqual(row.many(rows), [row(**flags) for flags in rows])
+
+    def test_classnames_many(self):
+        rows = [("a", {"b": i % 2}) for i in range(4)]
+        self.assertEqual(classnames_many(rows), ["a", "a b", "a", "a b"])
@@ -0,0 +1,192 @@
+from functools import partial
+from hotmetal import render, safe, static, StaticCache
+from hotmetal.utils.compiler import compile_component
+from unittest import TestCase
+
+
+def card(title, body, href, variant="plain", *, items=()):
+    return (
+        "div",
+        {"class": f"card card-{variant}", "data-variant": variant, "hidden": ""},
+        [
+            ("h2", {}, [title]),
+            ("", {}, [body, f"{title}!"]),
+            ("a", {"href": href, "title": "Go to " + title}, [f"{title:>8}"]),
+            ("ul", {}, items),
+            ("br", {}, []),
+            static(("p", {}, ["Static"])),
+        ],
+    )
+
+
+def positional_only(a, /, b):
+    return ("p", {"a": a}, [b])
+
+
+def shouting(title):
+    return ("h1", {}, [title.upper()])
+
+
+def shouting_str(title):
+    return ("h1", {}, [str(title).upper()])
+
+
+def conditional(title):
+    return ("h1", {}, [title] if title else [])
+
+
+def with_closure(title):
+    return ("h1", {}, [lambda context: title])
+
+
+def greet(name, context):
+    return f"Hi {name}"
+
+
+def with_partial(title):
+    return ("h1", {}, [partial(greet, title)])
+
+
+def with_default(title):
+    return ("h1", {}, [lambda context, title=title: title])
+
+
+def bare(title):
+    return title
+
+
+def with_repr(name):
+    return ("p", {}, [f"Hi {name!r}"])
+
+
+def with_isinstance(title):
+    return ("p", {}, [title if isinstance(title, str) else "obj"])
+
+
+def with_is_none(sub):
+    return ("p", {}, [sub]) if sub is not None else ""
+
+
+def optional(x):
+    return ("p", {}, ["yes" if x is None else x])
+
+
+def by_length(x):
+    return ("p", {}, ["long" if len(f"{x}") > 12 else "short"])
+
+
+def by_str(x):
+    return ("p", {}, ["home" if str(x) == "/" else x])
+
+
+def label(x):
+    return "none" if x is None else x
+
+
+def with_helper(x):
+    return ("p", {}, [label(x)])
+
+
+VALUES = ["", "<T & 'U'>", safe("<b>"), None, ("i", {}, ["x"]), ("", {}, [])]
+
+
+class CompileComponentTestCase(TestCase):
+    def assertRendersLikeOriginal(self, original, compiled, *args, **kwargs):
+        for indent in [0, 1, 2]:
+            for wrap in [
+                lambda node: node,
+                lambda node: ("section", {}, [node]),
+                lambda node: ("", {}, [("b", {}, [("", {}, [node])])]),
+            ]:
+                self.assertEqual(
+                    render(wrap(compiled(*args, **kwargs)), indent=indent),
+                    render(wrap(original(*args, **kwargs)), indent=indent),
+                )
+
+    def test_compiled_output_matches_render(self):
+        compiled = compile_component(card)
+        for value in VALUES:
+            for href in ["", "/a'b"]:
+                for items in [(), [("li", {}, ["x"])], [""]]:
+                    self.assertRendersLikeOriginal(
+                        card, compiled, "Title", value, href, items=items
+                    )
+                    self.assertRendersLikeOriginal(
+                        card, compiled, "", value, href, "big", items=items
+                    )
+        self.assertIsNotNone(compiled.component.template)
+
+    def test_positional_only_parameters(self):
+        compiled = compile_component(positional_only)
+        self.assertRendersLikeOriginal(positional_only, compiled, "", "x")
+        self.assertIsNotNone(compiled.component.template)
+
+    def test_data_dependent_components_fall_back(self):
+        for component in [
+            shouting,
+            with_closure,
+            with_partial,
+            with_default,
+            bare,
+            with_repr,
+        ]:
+            compiled = compile_component(component)
+            for value in ["", "title"]:
+                self.assertRendersLikeOriginal(component, compiled, value)
+            self.assertIsNone(compiled.component.template)
+
+    def test_components_that_inspect_values_are_not_compiled(self):
+        for component in [
+            shouting_str,
+            conditional,
+            with_isinstance,
+            with_is_none,
+            optional,
+            by_length,
+            by_str,
+            with_helper,
+        ]:
+            self.assertIs(compile_component(component), component)
+
+    def test_untraceable_trees_found_while_rendering_fall_back(self):
+        compiled = compile_component(card)
+        node = compiled("T", "b", "/")
+        # Code for other indentation settings is generated when they're first
+        # rendered.
+        node.template.tree = ("p", {}, [partial(greet, "T")])
+        self.assertEqual(render(node, indent=2), render(card("T", "b", "/"), indent=2))
+        self.assertIsNone(compiled.component.template)
+        self.assertRendersLikeOriginal(card, compiled, "T", "b", "/")
+
+    def test_static_cache_does_not_cache_compiled_nodes(self):
+        @compile_component
+        def greeting(title):
+            return ("p", {}, [title, lambda context: context["u"]])
+
+        cache = StaticCache()
+        node = ("div", {}, (greeting("Hi "),))
+        self.assertEqual(
+            render(node, {"u": "alice"}, static_cache=cache),
+            "<div><p>Hi alice</p></div>",
+        )
+        self.assertEqual(
+            render(node, {"u": "bob"}, static_cache=cache), "<div><p>Hi bob</p></div>"
+        )
+
+    def test_minify(self):
+        compiled = compile_component(card)
+        node = ("main", {}, [compiled("A  B", "x", "/a", items=[("li", {}, ["y"])])])
+        self.assertEqual(
+            render(node, minify=True),
+            render(
+                ("main", {}, [card("A  B", "x", "/a", items=[("li", {}, ["y"])])]),
+                minify=True,
+            ),
+        )
+        self.assertNotIn(" />", render(node, minify=True))
+
+    def test_keeps_name_and_signature(self):
+        compiled = compile_component(card)
+        self.assertEqual(compiled.__name__, "card")
+        with self.assertRaises(TypeError):
+            compiled("too", "few")
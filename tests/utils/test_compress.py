@@ -0,0 +1,75 @@
+from hotmetal import render
+from hotmetal.utils.compress import precompressed, render_compressed
+from unittest import TestCase
+
+import gzip
+import zlib
+
+HEADER = precompressed(
+    (
+        "header",
+        {},
+        [("nav", {}, [("a", {"href": f"/{i}"}, [f"Link {i} é"]) for i in range(50)])],
+    )
+)
+
+
+def page(rows=200):
+    return (
+        "html",
+        {},
+        [
+            ("head", {}, [("title", {}, ["Page"])]),
+            (
+                "body",
+                {},
+                [
+                    HEADER,
+                    ("ul", {}, [("li", {}, [f"Row {i} <{i}>"]) for i in range(rows)]),
+                    HEADER,
+                    ("", {}, [HEADER]),
+                ],
+            ),
+        ],
+    )
+
+
+class RenderCompressedTestCase(TestCase):
+    def test_gzip(self):
+        for indent in [0, 2]:
+            for chunk_size in [1, 16384]:
+                chunks = render_compressed(page(), indent=indent, chunk_size=chunk_size)
+                self.assertEqual(
+                    gzip.decompress(b"".join(chunks)).decode(),
+                    render(page(), indent=indent),
+                )
+
+    def test_deflate(self):
+        self.assertEqual(
+            zlib.decompress(b"".join(render_compressed(page(), format="deflate"))),
+            render(page()).encode(),
+        )
+        with self.assertRaises(ValueError):
+            next(render_compressed(page(), format="brotli"))
+
+    def test_minify(self):
+        self.assertEqual(
+            gzip.decompress(b"".join(render_compressed(page(), minify=True))),
+            render(page(), minify=True).encode(),
+        )
+
+    def test_flushes_after_head(self):
+        first = next(render_compressed(page(), chunk_size=10**9))
+        decompressor = zlib.decompressobj(31)
+        self.assertTrue(decompressor.decompress(first).endswith(b"</head>"))
+
+    def test_precompressed_output_is_reused(self):
+        header = precompressed(("header", {}, ["x"]))
+        node = ("div", {}, [header, header])
+        b"".join(render_compressed(node))
+        compressed = header.rendered[(0, 1)].compressed
+        b"".join(render_compressed(node))
+        self.assertIs(header.rendered[(0, 1)].compressed, compressed)
+        self.assertEqual(
+            render(node), "<div><header>x</header><header>x</header></div>"
+        )
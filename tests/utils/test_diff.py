@@ -0,0 +1,166 @@
+from hotmetal import render, static
+from hotmetal.utils.diff import diff, INSERT, REMOVE, REMOVE_ATTR, REPLACE, SET_ATTR
+from html.parser import HTMLParser
+from unittest import TestCase
+
+
+class _Parser(HTMLParser):
+    """
+    Parses HTML into [tag, attrs, children] lists, standing in for the DOM
+    that patches would be applied to in a browser.
+    """
+
+    def __init__(self, html):
+        super().__init__()
+        self.root = [None, {}, []]
+        self.stack = [self.root]
+        self.feed(html)
+        self.close()
+
+    def handle_starttag(self, tag, attrs):
+        element = [tag, dict((key, value or "") for key, value in attrs), []]
+        self.stack[-1][2].append(element)
+        self.stack.append(element)
+
+    def handle_startendtag(self, tag, attrs):
+        self.stack[-1][2].append([tag, dict(attrs), []])
+
+    def handle_endtag(self, tag):
+        self.stack.pop()
+
+    def handle_data(self, data):
+        children = self.stack[-1][2]
+        if children and isinstance(children[-1], str):
+            children[-1] += data
+        else:
+            children.append(data)
+
+
+def parse(html):
+    return _Parser(html).root[2]
+
+
+def elements(node):
+    return [child for child in node[2] if not isinstance(child, str)]
+
+
+def apply(dom, patches):
+    root = [None, {}, dom]
+    for op, path, *args in patches:
+        parent, element = root, elements(root)[0] if dom else None
+        for index in path:
+            parent, element = element, elements(element)[index]
+        if op == REPLACE:
+            (replacement,) = parse(args[0]) or [""]
+            parent[2][parent[2].index(element)] = replacement
+        elif op == SET_ATTR:
+            element[1][args[0]] = args[1]
+        elif op == REMOVE_ATTR:
+            del element[1][args[0]]
+        elif op == INSERT:
+            siblings = elements(element)
+            position = (
+                element[2].index(siblings[args[0]])
+                if args[0] < len(siblings)
+                else len(element[2])
+            )
+            element[2][position:position] = parse(args[1])
+        elif op == REMOVE:
+            element[2].remove(elements(element)[args[0]])
+    return root[2]
+
+
+def item(key, text):
+    return ("li", {"key": key}, [text])
+
+
+class DiffTestCase(TestCase):
+    def assertPatches(self, old, new, context=None):
+        patches = diff(old, new, context)
+        self.assertEqual(
+            apply(parse(render(old, context)), patches),
+            parse(render(new, context)),
+        )
+        return patches
+
+    def test_identical_trees(self):
+        shared = ("ul", {}, [item("a", "1")])
+        self.assertEqual(self.assertPatches(shared, shared), [])
+        self.assertEqual(
+            self.assertPatches(("div", {}, [shared]), ("div", {}, [shared])), []
+        )
+
+    def test_attributes(self):
+        patches = self.assertPatches(
+            ("div", {"class": "a", "id": "x"}, ["t"]),
+            ("div", {"class": "b", "title": ""}, ["t"]),
+        )
+        self.assertEqual(
+            patches,
+            [
+                (SET_ATTR, (), "class", "b"),
+                (SET_ATTR, (), "title", ""),
+                (REMOVE_ATTR, (), "id"),
+            ],
+        )
+
+    def test_changed_text_replaces_its_parent(self):
+        patches = self.assertPatches(
+            ("div", {}, [("h1", {}, ["Title"]), ("p", {}, ["Count: ", "1"])]),
+            ("div", {}, [("h1", {}, ["Title"]), ("p", {}, ["Count: ", "2"])]),
+        )
+        self.assertEqual(patches, [(REPLACE, (1,), "<p>Count: 2</p>")])
+
+    def test_changed_tag(self):
+        patches = self.assertPatches(
+            ("div", {}, [("b", {}, ["x"])]), ("div", {}, [("i", {}, ["x"])])
+        )
+        self.assertEqual(patches, [(REPLACE, (0,), "<i>x</i>")])
+
+    def test_positional_children(self):
+        old = ("ul", {}, [("li", {}, ["a"]), ("li", {}, ["b"]), ("li", {}, ["c"])])
+        self.assertEqual(
+            self.assertPatches(old, ("ul", {}, [("li", {}, ["a"])])),
+            [(REMOVE, (), 2), (REMOVE, (), 1)],
+        )
+        self.assertPatches(("ul", {}, [("li", {}, ["a"])]), old)
+
+    def test_keyed_children(self):
+        old = ("ul", {}, [item("a", "1"), item("b", "2"), item("c", "3")])
+        new = ("ul", {}, [item("x", "0"), item("a", "1"), item("c", "4")])
+        patches = self.assertPatches(old, new)
+        self.assertEqual(
+            patches,
+            [
+                (REMOVE, (), 1),
+                (INSERT, (), 0, '<li key="x">0</li>'),
+                (REPLACE, (2,), '<li key="c">4</li>'),
+            ],
+        )
+
+    def test_reordered_keyed_children_replace_the_parent(self):
+        old = ("ul", {}, [item("a", "1"), item("b", "2")])
+        new = ("ul", {}, [item("b", "2"), item("a", "1")])
+        self.assertEqual(self.assertPatches(old, new), [(REPLACE, (), render(new))])
+
+    def test_fragments_and_context_callables(self):
+        def counter(context):
+            return ("span", {}, [str(context["count"])])
+
+        old = ("div", {}, [("", {}, [("b", {}, []), None]), counter])
+        new = ("div", {}, [("b", {}, []), ("", {}, [counter, ("i", {}, [])])])
+        patches = self.assertPatches(old, new, {"count": 1})
+        self.assertEqual(patches, [(INSERT, (), 2, "<i></i>")])
+
+    def test_static_nodes(self):
+        header = static(("header", {}, ["x"]))
+        self.assertEqual(
+            self.assertPatches(("div", {}, [header]), ("div", {}, [header])), []
+        )
+        self.assertPatches(
+            ("div", {}, [header]), ("div", {}, [static(("header", {}, ["y"]))])
+        )
+
+    def test_roots(self):
+        self.assertPatches(("", {}, [("p", {}, [])]), ("", {}, [("b", {}, [])]))
+        self.assertPatches(("p", {}, []), ("b", {}, []))
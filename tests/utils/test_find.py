@@ -1,3 +1,4 @@
+from hotmetal import h, static
 from hotmetal.utils.find import (
     and_,
     any_immediate_child_matches,
@@ -9,12 +10,15 @@ from hotmetal.utils.find import (
     has_class,
     id_is,
     is_context_node,
+    is_static_node,
     is_text_node,
     is_tree_node,
+    materialize,
     not_,
     or_,
     tag_is,
     text_contains,
+    TreeIndex,
 )
 from unittest import TestCase
 
@@ -38,6 +42,13 @@ class FindTestCase(TestCase):
         result = [*find(nodes, predicate)]
         self.assertEqual(result, [("p", {}, [])])
 
+    def test_find_elements(self):
+        nodes = [h("div", None, [h("h1"), h("p", {"class": "a b"}, ["x"])])]
+        self.assertEqual(
+            [*find(nodes, has_class("b"))], [("p", {"class": "a b"}, ["x"])]
+        )
+        self.assertEqual([*TreeIndex(nodes).find(tag_is("h1"))], [("h1", {}, ())])
+
 
 class IsTreeNodeTestCase(TestCase):
     def test_match(self):
@@ -46,6 +57,22 @@ class IsTreeNodeTestCase(TestCase):
         self.assertEqual(result, [("div", {}, [])])
 
 
+class StaticNodesAreLeavesTestCase(TestCase):
+    nav = static(("nav", {}, [("a", {"class": "x"}, ["Home"])]))
+    nodes = [("div", {"class": "x"}, [nav, ("p", {"class": "x"}, [nav])])]
+
+    def test_find(self):
+        self.assertEqual([*find(self.nodes, is_static_node)], [self.nav, self.nav])
+        self.assertEqual(
+            [node[0] for node in find(self.nodes, has_class("x"))], ["div", "p"]
+        )
+
+    def test_tree_index(self):
+        index = TreeIndex(self.nodes)
+        self.assertEqual([node[0] for node in index.find(has_class("x"))], ["div", "p"])
+        self.assertEqual(index.find(is_static_node), [self.nav, self.nav])
+
+
 class IsTextNodeTestCase(TestCase):
     def test_match(self):
         nodes = [("div", {}, []), "text", lambda _: "context"]
@@ -241,3 +268,71 @@ class ExampleComponentTestCase(TestCase):
         [h1] = find([header], tag_is("h1"))
         [title] = h1[CHILDREN]
         self.assertEqual(title, "Test Page")
+
+
+class TreeIndexTestCase(TestCase):
+    def setUp(self):
+        self.nodes = [
+            example_page(title="Test Page"),
+            ("div", {"id": "header", "class": "a  b"}, ["header", lambda _: "x"]),
+            ("input", {"type": "text", "class": "b", "disabled": ""}, []),
+        ]
+        self.index = TreeIndex(self.nodes)
+
+    def assertSameResults(self, predicate):
+        self.assertEqual(self.index.find(predicate), [*find(self.nodes, predicate)])
+
+    def test_indexed_predicates(self):
+        for predicate in [
+            tag_is("h1"),
+            tag_is("nope"),
+            id_is("header"),
+            has_class("b"),
+            has_class(""),
+            has_attr("disabled"),
+            has_attr_with_value("type", "text"),
+            attr_value_matches("class", lambda value: "a" in value),
+        ]:
+            self.assertSameResults(predicate)
+
+    def test_combined_predicates(self):
+        for predicate in [
+            and_(tag_is("div"), has_class("b")),
+            and_(tag_is("div"), text_contains("header")),
+            or_(tag_is("input"), id_is("header")),
+            or_(tag_is("input"), text_contains("header")),
+            and_(or_(tag_is("input"), tag_is("div")), has_class("b")),
+        ]:
+            self.assertSameResults(predicate)
+
+    def test_unindexed_predicates(self):
+        for predicate in [
+            is_text_node,
+            is_context_node,
+            is_static_node,
+            text_contains("Test"),
+            not_(tag_is("div")),
+            and_(is_tree_node, any_immediate_child_matches(tag_is("h1"))),
+        ]:
+            self.assertSameResults(predicate)
+
+    def test_maps(self):
+        self.assertEqual(len(self.index.tags["div"]), 2)
+        self.assertEqual(self.index.ids["header"], [6, 9])
+
+
+class OneShotChildrenTestCase(TestCase):
+    def rows(self):
+        return ("ul", {}, (("li", {"class": "row"}, [str(i)]) for i in range(3)))
+
+    def test_find_raises_for_one_shot_children(self):
+        with self.assertRaisesRegex(TypeError, "materialize"):
+            [*find([self.rows()], has_class("row"))]
+        with self.assertRaises(TypeError):
+            TreeIndex([self.rows()])
+
+    def test_materialize(self):
+        tree = materialize(("div", {}, [self.rows(), "text"]))
+        for _ in range(2):
+            self.assertEqual(len([*find([tree], has_class("row"))]), 3)
+        self.assertEqual(tree[CHILDREN][1:], ["text"])
@@ -0,0 +1,165 @@
+from concurrent.futures import ThreadPoolExecutor
+from hotmetal import render, StaticCache
+from hotmetal.utils.memo import memo
+from unittest import TestCase
+
+import sys
+
+
+class Clock:
+    now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_menu(**kwargs):
+    calls = []
+
+    @memo(**kwargs)
+    def menu(items, active=None):
+        calls.append(items)
+        return (
+            "ul",
+            {},
+            [
+                ("li", {"class": "active" if item == active else ""}, [item])
+                for item in items
+            ],
+        )
+
+    return menu, calls
+
+
+def greeting(context):
+    return ("p", {}, [f"Hello, {context['name']}"])
+
+
+class MemoTestCase(TestCase):
+    def test_output_is_unchanged(self):
+        menu, _ = make_menu()
+        for indent in [0, 2]:
+            for wrap in [
+                lambda node: node,
+                lambda node: ("nav", {}, [node]),
+                lambda node: ("", {}, [node, "x"]),
+            ]:
+                self.assertEqual(
+                    render(wrap(menu(("a", "<b>"), active="a")), indent=indent),
+                    render(wrap(menu.__wrapped__(("a", "<b>"), "a")), indent=indent),
+                )
+
+    def test_output_is_cached_by_arguments_and_level(self):
+        menu, calls = make_menu()
+        render(("div", {}, [menu(("a",)), menu(("a",)), menu(("b",))]))
+        self.assertEqual(calls, [("a",), ("b",)])
+        render(("div", {}, [("div", {}, [menu(("a",))])]), indent=2)
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(menu.stats()["hits"], 1)
+        self.assertEqual(menu.stats()["misses"], 3)
+        self.assertEqual(menu.hit_rate, 0.25)
+        self.assertGreater(menu.memory, 0)
+
+    def test_unhashable_arguments_are_not_cached(self):
+        menu, calls = make_menu()
+        render(("div", {}, [menu(["a"]), menu(["a"])]))
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(len(menu), 0)
+
+    def test_maxsize(self):
+        menu, calls = make_menu(maxsize=2)
+        for items in [("a",), ("b",), ("c",), ("a",)]:
+            render(menu(items))
+        self.assertEqual(len(calls), 4)
+        self.assertEqual(len(menu), 2)
+
+    def test_ttl(self):
+        clock = Clock()
+        menu, calls = make_menu(ttl=10, clock=clock)
+        render(menu(("a",)))
+        clock.now = 9
+        render(menu(("a",)))
+        self.assertEqual(len(calls), 1)
+        clock.now = 10
+        render(menu(("a",)))
+        self.assertEqual(len(calls), 2)
+
+    def test_invalidate(self):
+        menu, calls = make_menu()
+        for indent in [0, 2]:
+            render(menu(("a",)), indent=indent)
+            render(menu(("b",)), indent=indent)
+        menu.invalidate(("a",))
+        self.assertEqual(len(menu), 2)
+        render(menu(("a",)))
+        render(menu(("b",)))
+        self.assertEqual(len(calls), 5)
+        menu.clear()
+        self.assertEqual(menu.stats()["memory"], 0)
+        self.assertEqual(len(menu), 0)
+
+    def test_depends_on_context(self):
+        @memo(depends_on=["name"])
+        def panel(title):
+            return ("div", {}, [title, greeting])
+
+        self.assertEqual(
+            render(panel("t"), {"name": "x"}), "<div>t<p>Hello, x</p></div>"
+        )
+        self.assertEqual(
+            render(panel("t"), {"name": "y"}), "<div>t<p>Hello, y</p></div>"
+        )
+        self.assertEqual(
+            render(panel("t"), {"name": "x"}), "<div>t<p>Hello, x</p></div>"
+        )
+        self.assertEqual(panel.hits, 1)
+
+    def test_threads(self):
+        menu, _ = make_menu(maxsize=4)
+        items = [(f"item {i % 9}",) for i in range(2000)]
+
+        def run(items):
+            return render(("nav", {}, [menu(items)]))
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(run, items))
+        self.assertEqual(
+            results, [render(("nav", {}, [menu.__wrapped__(i)])) for i in items]
+        )
+        self.assertLessEqual(len(menu), 4 + 8)
+
+    def test_not_cached_by_static_cache(self):
+        @memo(depends_on=["name"])
+        def panel(title):
+            return ("div", {}, [title, greeting])
+
+        cache = StaticCache()
+        node = ("section", {}, (panel("t"),))
+        for name in ["x", "y"]:
+            self.assertEqual(
+                render(node, {"name": name}, static_cache=cache),
+                f"<section><div>t<p>Hello, {name}</p></div></section>",
+            )
+
+    def test_invalidate_while_rendering_in_threads(self):
+        menu, _ = make_menu(maxsize=1000)
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        self.addCleanup(sys.setswitchinterval, interval)
+
+        def run(i):
+            if i % 4 == 0:
+                menu.invalidate((f"item {i % 500}",))
+            return render(menu((f"item {i % 500}",)))
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(run, range(3000)))
+        self.assertEqual(results[3], render(menu.__wrapped__(("item 3",))))
+
+    def test_minify(self):
+        menu, _ = make_menu()
+        render(menu(("a  b",)))
+        self.assertEqual(
+            render(("nav", {}, [menu(("a  b",))]), minify=True),
+            "<nav><ul><li class>a b</li></ul></nav>",
+        )
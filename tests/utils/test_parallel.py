@@ -0,0 +1,78 @@
+from concurrent.futures import ProcessPoolExecutor
+from hotmetal import render
+from hotmetal.utils.parallel import render_parallel
+from unittest import TestCase
+
+
+def greeting(context):
+    return ("p", {}, [f"Hello, {context['name']}"])
+
+
+def page():
+    return (
+        "",
+        {},
+        [
+            ("h1", {}, ["Report"]),
+            *[
+                ("section", {"id": str(i)}, [greeting, ("br", {}, [])])
+                for i in range(20)
+            ],
+            "",
+            ("footer", {}, []),
+        ],
+    )
+
+
+class RenderParallelTestCase(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.executor = ProcessPoolExecutor(max_workers=2)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.executor.shutdown()
+
+    def test_matches_render(self):
+        context = {"name": "<world>"}
+        for indent in [0, 2]:
+            for depth in [1, 2, 3]:
+                self.assertEqual(
+                    render_parallel(
+                        page(), context, indent, depth=depth, executor=self.executor
+                    ),
+                    render(page(), context, indent),
+                )
+
+    def test_unpicklable_subtrees_fall_back_to_this_process(self):
+        node = ("div", {}, [("p", {}, [lambda context: context["name"]])])
+        self.assertEqual(
+            render_parallel(node, {"name": "hi"}, executor=self.executor),
+            "<div><p>hi</p></div>",
+        )
+
+    def test_unpicklable_subtrees_without_fallback(self):
+        node = ("div", {}, [("p", {}, [lambda context: context["name"]])])
+        with self.assertRaises(TypeError):
+            render_parallel(
+                node, {"name": "hi"}, executor=self.executor, fallback=False
+            )
+
+    def test_creates_its_own_pool(self):
+        self.assertEqual(
+            render_parallel(page(), {"name": "x"}, workers=2),
+            render(page(), {"name": "x"}),
+        )
+
+    def test_own_pool_calls_callables_above_the_split_once(self):
+        calls = []
+
+        def layout(context):
+            calls.append(context)
+            return page()
+
+        self.assertEqual(
+            render_parallel(layout, {"name": "x"}, workers=2),
+            render(page(), {"name": "x"}),
+        )
+        self.assertEqual(len(calls), 1)
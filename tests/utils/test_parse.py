@@ -0,0 +1,118 @@
+from hotmetal import render, safe
+from hotmetal.utils.find import find, has_class, tag_is
+from hotmetal.utils.parse import iterparse, parse
+from unittest import TestCase
+
+DOCUMENT = (
+    "html",
+    {"lang": "en"},
+    [
+        ("head", {}, [("title", {}, ["Tom & Jerry's <page>"])]),
+        (
+            "body",
+            {"class": "main"},
+            [
+                ("input", {"type": "checkbox", "checked": "", "value": '"x"'}, []),
+                ("p", {}, ["Hello, ", ("b", {}, ["world"]), "!"]),
+                ("script", {}, [safe("if (a < b && c) { x(); }")]),
+                ("br", {}, []),
+            ],
+        ),
+    ],
+)
+
+
+class ParseTestCase(TestCase):
+    def test_round_trip(self):
+        html = render(DOCUMENT)
+        self.assertEqual(render(parse(html)), html)
+        self.assertEqual(parse(html), ("", {}, [DOCUMENT]))
+
+    def test_void_elements_and_self_closing_tags(self):
+        self.assertEqual(
+            parse('<p>a<br>b<img src="x" /><div/></p>'),
+            (
+                "",
+                {},
+                [
+                    (
+                        "p",
+                        {},
+                        [
+                            "a",
+                            ("br", {}, []),
+                            "b",
+                            ("img", {"src": "x"}, []),
+                            ("div", {}, []),
+                        ],
+                    )
+                ],
+            ),
+        )
+
+    def test_unclosed_and_unmatched_tags(self):
+        self.assertEqual(
+            parse("<ul><li>a<li>b</ul></span>c<div>"),
+            (
+                "",
+                {},
+                [
+                    ("ul", {}, [("li", {}, ["a", ("li", {}, ["b"])])]),
+                    "c",
+                    ("div", {}, []),
+                ],
+            ),
+        )
+
+    def test_comments_and_doctype_are_dropped(self):
+        self.assertEqual(
+            parse("<!DOCTYPE html><!-- x --><p>a</p>"), ("", {}, [("p", {}, ["a"])])
+        )
+
+    def test_repeated_attributes(self):
+        self.assertEqual(
+            parse('<a id="1" id="2"></a>'), ("", {}, [("a", {"id": "1"}, [])])
+        )
+
+    def test_find(self):
+        tree = parse(render(DOCUMENT))
+        self.assertEqual([*find([tree], tag_is("b"))], [("b", {}, ["world"])])
+
+
+class IterparseTestCase(TestCase):
+    html = (
+        '<ul><li class="item">1 <b>one</b></li><li>2</li>'
+        '<li class="item">3<ul><li class="item">4</li></ul></li>'
+        '<li class="item"><img class="item"></li></ul>'
+    )
+
+    def test_yields_matching_subtrees(self):
+        items = [*iterparse(self.html, has_class("item"))]
+        self.assertEqual(
+            [render(item) for item in items],
+            [
+                '<li class="item">1 <b>one</b></li>',
+                '<li class="item">3<ul><li class="item">4</li></ul></li>',
+                '<li class="item"><img class="item" /></li>',
+            ],
+        )
+
+    def test_chunks(self):
+        chunks = [self.html[i : i + 7] for i in range(0, len(self.html), 7)]
+        self.assertEqual(
+            [*iterparse(chunks, has_class("item"))],
+            [*iterparse(self.html, has_class("item"))],
+        )
+
+    def test_void_elements(self):
+        self.assertEqual(
+            [*iterparse('<p><img src="a"><img src="b"></p>', tag_is("img"))],
+            [("img", {"src": "a"}, []), ("img", {"src": "b"}, [])],
+        )
+
+    def test_is_incremental(self):
+        def chunks():
+            yield "<div><p>1</p>"
+            raise AssertionError("read too far")
+
+        self.assertEqual(next(iterparse(chunks(), tag_is("p"))), ("p", {}, ["1"]))
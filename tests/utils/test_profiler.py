@@ -0,0 +1,56 @@
+from hotmetal import render
+from hotmetal.utils.profiler import Profiler
+from itertools import count
+from unittest import TestCase
+
+import json
+
+
+def greeting(context):
+    return ("p", {}, [f"Hello, {context['name']}"])
+
+
+def page():
+    return ("div", {}, [greeting, greeting])
+
+
+class ProfilerTestCase(TestCase):
+    def setUp(self):
+        self.profiler = Profiler(clock=count().__next__)
+
+    def test_output_is_unchanged(self):
+        for indent in [0, 2]:
+            self.assertEqual(
+                render(page(), {"name": "x"}, indent, profiler=Profiler()),
+                render(page(), {"name": "x"}, indent),
+            )
+
+    def test_counts_and_bytes(self):
+        render(page(), {"name": "x"}, profiler=self.profiler)
+        stats = self.profiler.stats
+        self.assertEqual(stats[("component", "greeting")].calls, 2)
+        self.assertEqual(stats[("tag", "p")].calls, 2)
+        self.assertEqual(stats[("tag", "p")].bytes, len("<p>Hello, x</p>") * 2)
+        self.assertEqual(
+            stats[("tag", "div")].bytes, len(render(page(), {"name": "x"}))
+        )
+        self.assertEqual(stats[("tag", "div")].max_depth, 1)
+        self.assertEqual(stats[("tag", "p")].max_depth, 3)
+
+    def test_self_time_excludes_children(self):
+        render(page(), {"name": "x"}, profiler=self.profiler)
+        stats = self.profiler.stats
+        component = stats[("component", "greeting")]
+        tag = stats[("tag", "p")]
+        self.assertEqual(component.total_time - component.self_time, tag.total_time)
+
+    def test_root_component(self):
+        render(greeting, {"name": "x"}, profiler=self.profiler)
+        self.assertEqual(self.profiler.stats[("component", "greeting")].calls, 1)
+
+    def test_reports(self):
+        render(page(), {"name": "x"}, profiler=self.profiler)
+        rows = json.loads(self.profiler.to_json(sort="calls"))
+        self.assertEqual(rows[0]["calls"], 2)
+        self.assertEqual(len(rows), 3)
+        self.assertIn("greeting", self.profiler.table())
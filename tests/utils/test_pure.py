@@ -0,0 +1,183 @@
+from concurrent.futures import ThreadPoolExecutor
+from hotmetal import render, static
+from hotmetal.utils.pure import pure
+from unittest import TestCase
+
+
+def make_panel(**kwargs):
+    calls = []
+
+    @pure(**kwargs)
+    def panel(context):
+        calls.append(context["user"])
+        return ("div", {"class": "user"}, [context["user"]])
+
+    return panel, calls
+
+
+class PureTestCase(TestCase):
+    def test_output_is_unchanged(self):
+        panel, _ = make_panel()
+        node = ("ul", {}, [("li", {}, [panel, str(i)]) for i in range(3)])
+        self.assertEqual(
+            render(node, {"user": "<ann>"}),
+            render(node, {"user": "<ann>"}),
+        )
+        self.assertEqual(
+            render(node, {"user": "<ann>"}, indent=2),
+            render(
+                ("ul", {}, [("li", {}, [panel.__wrapped__, str(i)]) for i in range(3)]),
+                {"user": "<ann>"},
+                indent=2,
+            ),
+        )
+
+    def test_evaluated_once_per_render(self):
+        panel, calls = make_panel()
+        render(("", {}, [panel] * 10), {"user": "ann"})
+        self.assertEqual(calls, ["ann"])
+        self.assertEqual(
+            panel.stats(), {"calls": 10, "evaluations": 1, "saved": 9, "entries": 1}
+        )
+
+    def test_reused_across_renders_when_keys_read_are_equal(self):
+        panel, calls = make_panel()
+        render(panel, {"user": "ann", "path": "/"})
+        render(panel, {"user": "ann", "path": "/other/"})
+        self.assertEqual(calls, ["ann"])
+        render(panel, {"user": "bob", "path": "/"})
+        self.assertEqual(calls, ["ann", "bob"])
+        render(panel, {"user": "ann"})
+        self.assertEqual(calls, ["ann", "bob"])
+        self.assertEqual(panel.saved, 2)
+
+    def test_missing_keys_are_dependencies(self):
+        calls = []
+
+        @pure()
+        def greeting(context):
+            calls.append(1)
+            return context.get("user", "stranger")
+
+        self.assertEqual(render(greeting, {}), "stranger")
+        self.assertEqual(render(greeting, {"path": "/"}), "stranger")
+        self.assertEqual(render(greeting, {"user": "ann"}), "ann")
+        # A key set to None isn't the same as a missing key.
+        self.assertEqual(render(greeting, {"user": None}), "")
+        self.assertEqual(len(calls), 3)
+
+    def test_different_keys_read(self):
+        calls = []
+
+        @pure()
+        def badge(context):
+            calls.append(1)
+            return context["user"] if "admin" in context else None
+
+        for context in [{}, {"admin": True, "user": "ann"}, {}, {"admin": 1}]:
+            render(("p", {}, [badge]), {**context, "user": "ann"})
+        self.assertEqual(len(calls), 2)
+
+    def test_unhashable_values_and_iteration_are_not_cached(self):
+        calls = []
+
+        @pure()
+        def everything(context):
+            calls.append(1)
+            return ", ".join(context)
+
+        @pure()
+        def tags(context):
+            calls.append(1)
+            return ", ".join(context["tags"])
+
+        context = {"tags": ["a", "b"]}
+        self.assertEqual(
+            render(("p", {}, [everything, everything]), context), "<p>tagstags</p>"
+        )
+        self.assertEqual(render(("p", {}, [tags, tags]), context), "<p>a, ba, b</p>")
+        self.assertEqual(len(calls), 4)
+        self.assertEqual(len(everything) + len(tags), 0)
+
+    def test_maxsize_and_clear(self):
+        panel, calls = make_panel(maxsize=2)
+        for user in ["a", "b", "c", "a"]:
+            render(panel, {"user": user})
+        self.assertEqual(len(calls), 4)
+        self.assertEqual(len(panel), 2)
+        render(panel, {"user": "c"})
+        self.assertEqual(len(calls), 4)
+        panel.clear()
+        self.assertEqual(len(panel), 0)
+        self.assertEqual(panel.stats()["calls"], 0)
+
+    def test_nested_callables_get_the_real_context(self):
+        seen = []
+
+        def inner(context):
+            seen.append(context)
+            return "x"
+
+        @pure()
+        def outer(context):
+            return ("p", {}, [inner])
+
+        context = {"user": "ann"}
+        render(("", {}, [outer, outer]), context)
+        self.assertEqual(seen, [context, context])
+        self.assertEqual(outer.saved, 1)
+
+    def test_constant_results_are_rendered_once(self):
+        panel, _ = make_panel()
+        self.assertIsInstance(panel({"user": "ann"}), static)
+        node = ("div", {}, [("p", {}, [panel]), panel])
+        self.assertEqual(
+            render(node, {"user": "ann"}, indent=2),
+            render(
+                ("div", {}, [("p", {}, [panel.__wrapped__]), panel.__wrapped__]),
+                {"user": "ann"},
+                indent=2,
+            ),
+        )
+
+    def test_one_shot_children_are_not_cached(self):
+        @pure()
+        def items(context):
+            return ("ul", {}, (("li", {}, [item]) for item in context["items"]))
+
+        node = ("", {}, [items, items])
+        context = {"items": ("a", "b")}
+        self.assertEqual(render(node, context), render(node, context))
+        self.assertEqual(render(node, context).count("<li>"), 4)
+        self.assertEqual(items.saved, 0)
+
+    def test_threads(self):
+        panel, calls = make_panel(maxsize=4)
+        users = [f"user {i % 9}" for i in range(2000)]
+
+        def run(user):
+            return render(("", {}, [panel, panel]), {"user": user})
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(run, users))
+        self.assertEqual(
+            results,
+            [render(("", {}, [panel.__wrapped__] * 2), {"user": u}) for u in users],
+        )
+        self.assertLessEqual(len(panel), 4 + 8)
+        self.assertEqual(panel.stats()["entries"], len(panel))
+
+    def test_entry_put_back_after_clear(self):
+        panel, _ = make_panel(maxsize=1)
+        panel({"user": "a"})
+        # A lookup in another thread pops an entry, `clear` runs, and then
+        # the lookup puts the entry back.
+        key = next(iter(panel._entries))
+        result = panel._entries.pop(key)
+        panel.clear()
+        panel._entries[key] = result
+        for user in ["b", "c", "d"]:
+            self.assertEqual(
+                render(panel, {"user": user}), f'<div class="user">{user}</div>'
+            )
+        self.assertEqual(len(panel), 1)
@@ -0,0 +1,85 @@
+from hotmetal import static
+from hotmetal.utils.find import and_, find, has_attr_with_value, has_class, tag_is
+from hotmetal.utils.select import compile_selector, select
+from unittest import TestCase
+
+big_input = ("input", {"type": "text", "class": "big wide"}, [])
+small_input = ("input", {"type": "text", "lang": "en-GB"}, [])
+hidden_input = ("input", {"type": "hidden", "data-x": "abc"}, [])
+nested_input = ("input", {"type": "text", "class": "big"}, [])
+paragraph = ("p", {"id": "help"}, ["Help", nested_input])
+login = (
+    "form",
+    {"id": "login"},
+    [big_input, "text", ("", {}, [small_input, hidden_input]), paragraph],
+)
+page = ("div", {}, [login, ("span", {}, [])])
+
+
+class SelectTestCase(TestCase):
+    def assertSelects(self, selector, expected):
+        self.assertEqual([*select([page], selector)], expected)
+
+    def test_compound_selectors(self):
+        self.assertSelects(
+            "input", [big_input, small_input, hidden_input, nested_input]
+        )
+        self.assertSelects("#help", [paragraph])
+        self.assertSelects(".big", [big_input, nested_input])
+        self.assertSelects("input.big.wide", [big_input])
+        self.assertSelects("*[id]", [login, paragraph])
+        self.assertSelects("form#login", [login])
+
+    def test_attribute_operators(self):
+        self.assertSelects("[type=hidden]", [hidden_input])
+        self.assertSelects('[type="hidden"]', [hidden_input])
+        self.assertSelects("[type='hidden']", [hidden_input])
+        self.assertSelects("[class~=wide]", [big_input])
+        self.assertSelects("[lang|=en]", [small_input])
+        self.assertSelects("[data-x^=ab]", [hidden_input])
+        self.assertSelects("[data-x$=bc]", [hidden_input])
+        self.assertSelects("[data-x*=b]", [hidden_input])
+
+    def test_combinators(self):
+        self.assertSelects("form#login > input[type=text].big", [big_input])
+        self.assertSelects("form input.big", [big_input, nested_input])
+        self.assertSelects("div > input", [])
+        self.assertSelects("input + input", [small_input, hidden_input])
+        self.assertSelects("input ~ p", [paragraph])
+        self.assertSelects("form ~ span", [page[2][1]])
+        self.assertSelects("div form > p > input", [nested_input])
+        self.assertSelects("input + input + input", [hidden_input])
+
+    def test_groups(self):
+        self.assertSelects("p, span", [paragraph, page[2][1]])
+
+    def test_matches_equivalent_find(self):
+        predicate = and_(
+            tag_is("input"), has_attr_with_value("type", "text"), has_class("big")
+        )
+        self.assertEqual(
+            [*select([page], "input[type=text].big")], [*find([page], predicate)]
+        )
+
+    def test_static_nodes_are_leaves(self):
+        nav = static(("nav", {}, [("a", {"class": "big"}, ["Home"])]))
+        self.assertEqual(
+            [*select([("div", {}, [nav, big_input])], ".big")], [big_input]
+        )
+        self.assertEqual([*select([("div", {}, [nav, big_input])], "nav")], [])
+
+    def test_invalid_selectors(self):
+        for selector in ["", "input:hover", "a >", "> a", "a,,b", "input["]:
+            with self.assertRaises(ValueError):
+                compile_selector(selector)
+
+    def test_invalid_attribute_value_position(self):
+        with self.assertRaisesRegex(ValueError, "at position 7$"):
+            compile_selector("[href$=.pdf]")
+        links = [("a", {"href": "a.pdf"}, []), ("a", {"href": "apdf"}, [])]
+        self.assertEqual([*select(links, '[href$=".pdf"]')], links[:1])
+
+    def test_compiled_selectors_are_cached(self):
+        self.assertIs(
+            compile_selector("form > input"), compile_selector("form > input")
+        )
@@ -0,0 +1,125 @@
+from concurrent.futures import ThreadPoolExecutor
+from hotmetal import render
+from hotmetal.utils.shared import SharedCache
+from queue import Queue
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+import multiprocessing
+import os
+
+
+def _value(key, writer, i):
+    # Each value is tagged with its key and padded to a length that depends on
+    # the writer and iteration, so that torn reads would be noticed.
+    body = f"{key}|{writer}|{i}|"
+    return body + "x" * ((writer * 37 + i) % 200) + "|end"
+
+
+def _hammer(path, writer, iterations, errors):
+    cache = SharedCache(path, slots=16, slot_size=512, ways=4)
+    _exercise(cache, writer, iterations, errors)
+    cache.close()
+
+
+def _exercise(cache, writer, iterations, errors):
+    keys = [f"key-{n}" for n in range(24)]
+    for i in range(iterations):
+        key = keys[(i * 7 + writer) % len(keys)]
+        cache.set(key, _value(key, writer, i))
+        for key in keys[i % 3 :: 5]:
+            value = cache.get(key)
+            if value is None:
+                continue
+            name, other, j, _ = value.split("|", 3)
+            if name != key or value != _value(key, int(other), int(j)):
+                errors.put(value)
+
+
+class SharedCacheTestCase(TestCase):
+    def setUp(self):
+        self.directory = TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "cache")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_get_and_set(self):
+        with SharedCache(self.path, slots=8, slot_size=64, ways=2) as cache:
+            self.assertIsNone(cache.get("a"))
+            self.assertTrue(cache.set("a", "<p>é</p>"))
+            self.assertEqual(cache.get("a"), "<p>é</p>")
+            self.assertTrue(cache.set("a", ""))
+            self.assertEqual(cache.get("a"), "")
+            self.assertFalse(cache.set("b", "x" * 64))
+            self.assertIsNone(cache.get("b"))
+            self.assertEqual((cache.hits, cache.misses), (2, 2))
+
+    def test_shared_between_instances(self):
+        with SharedCache(self.path, slots=8, slot_size=64, ways=2) as cache:
+            cache.set("a", "1")
+            with SharedCache(self.path, slots=8, slot_size=64, ways=2) as other:
+                self.assertEqual(other.get("a"), "1")
+                other.set("a", "2")
+            self.assertEqual(cache.get("a"), "2")
+
+    def test_geometry_must_match(self):
+        SharedCache(self.path, slots=8, slot_size=64, ways=2).close()
+        with self.assertRaises(ValueError):
+            SharedCache(self.path, slots=8, slot_size=64, ways=4)
+
+    def test_eviction(self):
+        with SharedCache(self.path, slots=4, slot_size=64, ways=4) as cache:
+            for i in range(4):
+                cache.set(str(i), str(i))
+            cache.get("0")
+            cache.set("4", "4")
+            self.assertEqual(cache.get("0"), "0")
+            self.assertEqual(cache.get("4"), "4")
+            self.assertEqual(sum(cache.get(str(i)) is None for i in range(1, 4)), 1)
+
+    def test_node(self):
+        calls = []
+
+        def header(context):
+            calls.append(context)
+            return ("header", {}, [("h1", {}, [context["title"]])])
+
+        with SharedCache(self.path, slots=8, slot_size=256, ways=2) as cache:
+            for indent in [0, 2]:
+                for _ in range(2):
+                    self.assertEqual(
+                        render(
+                            ("body", {}, [cache.node("header", header)]),
+                            {"title": "<Hi>"},
+                            indent,
+                        ),
+                        render(("body", {}, [header]), {"title": "<Hi>"}, indent),
+                    )
+        self.assertEqual(len(calls), 6)
+
+    def test_concurrent_writers(self):
+        SharedCache(self.path, slots=16, slot_size=512, ways=4).close()
+        context = multiprocessing.get_context("fork")
+        errors = context.Queue()
+        processes = [
+            context.Process(target=_hammer, args=(self.path, writer, 2000, errors))
+            for writer in range(4)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+            self.assertEqual(process.exitcode, 0)
+        self.assertTrue(errors.empty())
+
+    def test_concurrent_writer_threads(self):
+        errors = Queue()
+        with SharedCache(self.path, slots=16, slot_size=512, ways=4) as cache:
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                for future in [
+                    executor.submit(_exercise, cache, writer, 2000, errors)
+                    for writer in range(4)
+                ]:
+                    future.result()
+        self.assertTrue(errors.empty())